@@ -0,0 +1,342 @@
+'''
+Plays many matches at once on one asyncio event loop, each against its own pair of pokerbot processes.
+'''
+import argparse
+import asyncio
+import io
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.getcwd())
+import engine
+from engine import Player, Game, RoundState, CheckAction, FoldAction, WIRE_VERSION, read_response
+
+
+class BotProtocol(asyncio.Protocol):
+    '''
+    One pokerbot connection. Responses are timestamped as they arrive, so a pokerbot is charged
+    for its own time and not for the time the event loop spends on other matches.
+    '''
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.connected = loop.create_future()
+        self.transport = None
+        self.buffer = bytearray()
+        self.binary = False
+        self.waiter = None
+        self.lost = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+        if not self.connected.done():
+            self.connected.set_result(None)
+
+    def data_received(self, data):
+        arrival_time = time.perf_counter()
+        self.buffer += data
+        if self.waiter is not None and not self.waiter.done():
+            clause = self.take_response()
+            if clause is not None:
+                self.waiter.set_result((clause, arrival_time))
+
+    def connection_lost(self, exc):
+        self.lost = True
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_exception(ConnectionResetError('pokerbot disconnected'))
+
+    def take_response(self):
+        '''
+        Removes one complete response from the buffer and returns it as a text clause, or None if it is incomplete.
+        '''
+        if self.binary:
+            if len(self.buffer) < engine.WIRE_LENGTH.size:
+                return None
+            size = engine.WIRE_LENGTH.size + engine.WIRE_LENGTH.unpack_from(self.buffer)[0]
+            if len(self.buffer) < size:
+                return None
+            frame = bytes(self.buffer[:size])
+            del self.buffer[:size]
+            return read_response(io.BytesIO(frame))
+        end = self.buffer.find(b'\n')
+        if end < 0:
+            return None
+        line = bytes(self.buffer[:end])
+        del self.buffer[:end + 1]
+        return line.decode().strip()
+
+    async def exchange(self, message, timeout):
+        '''
+        Sends one message and waits for the response.
+        Returns the response clause and the seconds it took, raising socket.timeout after timeout seconds.
+        '''
+        if self.lost:
+            raise ConnectionResetError('pokerbot disconnected')
+        if isinstance(message, str):
+            message = message.encode()
+        self.waiter = self.loop.create_future()
+        start_time = time.perf_counter()
+        self.transport.write(message)
+        try:
+            clause, end_time = await asyncio.wait_for(self.waiter, timeout)
+        except asyncio.TimeoutError:
+            raise socket.timeout
+        return clause, end_time - start_time
+
+
+class AsyncPlayer(Player):
+    '''
+    A Player driven by the event loop, with an asyncio subprocess and connection in place of threads and socket files.
+    '''
+
+    def __init__(self, name, path, log_directory):
+        super().__init__(name, path, log_directory)
+        self.protocol = None
+        self.output_task = None
+
+    async def start(self):
+        '''
+        Builds the pokerbot off the event loop, then launches and connects it.
+        '''
+        await asyncio.get_running_loop().run_in_executor(None, self.build)
+        await self.connect()
+
+    async def launch_async(self, args, pass_fds=()):
+        '''
+        Starts the pokerbot process and a task collecting its output.
+        '''
+        self.bot_subprocess = await asyncio.create_subprocess_exec(*(self.commands['run'] + args),
+                                                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                                                   cwd=self.path, pass_fds=pass_fds)
+        self.output_task = asyncio.get_running_loop().create_task(self.capture_output(self.bot_subprocess.stdout))
+
+    async def capture_output(self, stdout):
+        '''
+        Streams the pokerbot's output into its player log until the process exits.
+        '''
+        while True:
+            output = await stdout.read(65536)
+            if not output:
+                break
+            self.player_log.write(output)
+
+    async def connect(self):
+        '''
+        Runs the pokerbot and establishes the connection over the configured transport.
+        '''
+        if self.commands is None or len(self.commands['run']) == 0:
+            return
+        engine.check_transport()
+        loop = asyncio.get_running_loop()
+        protocol = BotProtocol(loop)
+        try:
+            if engine.TRANSPORT == 'socketpair':
+                engine_socket, bot_socket = socket.socketpair()
+                with bot_socket:
+                    await self.launch_async(['--fd', str(bot_socket.fileno())], pass_fds=(bot_socket.fileno(),))
+                await loop.connect_accepted_socket(lambda: protocol, engine_socket)
+            else:
+                socket_directory = None
+                if engine.TRANSPORT == 'unix':
+                    socket_directory = tempfile.mkdtemp()
+                    address = os.path.join(socket_directory, 'engine.sock')
+                    server = await loop.create_unix_server(lambda: protocol, address)
+                    args = ['--unix', address]
+                else:
+                    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                    server_socket.bind(('', 0))
+                    server = await loop.create_server(lambda: protocol, sock=server_socket)
+                    args = [str(server_socket.getsockname()[1])]
+                try:
+                    await self.launch_async(args)
+                    await asyncio.wait_for(protocol.connected, engine.CONNECT_TIMEOUT)
+                finally:
+                    server.close()
+                    if socket_directory is not None:
+                        shutil.rmtree(socket_directory, ignore_errors=True)
+            self.protocol = protocol
+            await self.negotiate_async()
+            print(self.name, 'connected successfully')
+        except (TypeError, ValueError):
+            print(self.name, 'run command misformatted')
+        except asyncio.TimeoutError:
+            print('Timed out waiting for', self.name, 'to connect')
+        except OSError:
+            print(self.name, 'run failed - check "run" in commands.json')
+
+    async def negotiate_async(self):
+        '''
+        Offers the binary wire protocol and switches to it if the pokerbot accepts.
+        '''
+        self.wire = None
+        if engine.WIRE_PROTOCOL == 'binary':
+            clause, _ = await self.protocol.exchange(WIRE_VERSION + '\n', engine.CONNECT_TIMEOUT)
+            if clause == WIRE_VERSION:
+                self.protocol.binary = True
+                self.wire = self.protocol  # marks the binary protocol for encode_message
+
+    async def query_async(self, round_state, player_message, game_log):
+        '''
+        Requests one action from the pokerbot, as Player.query does.
+        '''
+        legal_actions = round_state.legal_actions() if isinstance(round_state, RoundState) else {CheckAction}
+        if self.protocol is not None and self.game_clock > 0.:
+            clause = ''
+            try:
+                message = self.prepare_message(player_message)
+                clause, seconds = await self.protocol.exchange(message, engine.CONNECT_TIMEOUT)
+                self.charge(round_state, legal_actions, seconds)
+                action = self.decode_action(round_state, legal_actions, clause, game_log)
+                if action is not None:
+                    return action
+            except socket.timeout:
+                self.disconnect(game_log, ' ran out of time')
+            except OSError:
+                self.disconnect(game_log, ' disconnected')
+            except (IndexError, KeyError, ValueError):
+                game_log.append(self.name + ' response misformatted: ' + str(clause))
+        return CheckAction() if CheckAction in legal_actions else FoldAction()
+
+    async def reset_async(self, round_num=1, bankroll=0, game_clock=None):
+        '''
+        Starts a new game with the running pokerbot, or resumes one at round_num, as Player.reset does.
+        '''
+        if self.game_clock <= 0. and self.bot_subprocess is not None:
+            print('Restarting', self.name)
+            await self.stop_async()
+            self.protocol = None
+            self.wire = None
+            self.bot_subprocess = None
+            await self.connect()
+        self.game_clock = engine.STARTING_GAME_CLOCK if game_clock is None else game_clock
+        self.bankroll = bankroll
+        self.decision_times = []
+        self.round_time = 0.
+        if self.protocol is not None:
+            clause = 'N' if round_num == 1 and bankroll == 0 else 'N{},{}'.format(round_num, bankroll)
+            try:
+                await self.protocol.exchange(self.encode_message([clause]), engine.CONNECT_TIMEOUT)
+            except OSError:
+                print(self.name, 'disconnected')
+                self.game_clock = 0.
+
+    async def stop_async(self):
+        '''
+        Closes the connection, waits for the pokerbot to quit and writes its player log.
+        '''
+        if self.protocol is not None and not self.protocol.lost:
+            message = self.encode_message(['Q'])
+            self.protocol.transport.write(message.encode() if isinstance(message, str) else message)
+            self.protocol.transport.close()
+        if self.bot_subprocess is not None:
+            try:
+                await asyncio.wait_for(self.bot_subprocess.wait(), engine.CONNECT_TIMEOUT)
+            except asyncio.TimeoutError:
+                print('Timed out waiting for', self.name, 'to quit')
+                self.bot_subprocess.kill()
+                await self.bot_subprocess.wait()
+            if self.output_task is not None:
+                try:
+                    await asyncio.wait_for(self.output_task, engine.CONNECT_TIMEOUT)
+                except asyncio.TimeoutError:  # wait_for cancels the task
+                    print('Timed out collecting the output of', self.name)
+        self.player_log.close()
+
+
+async def play_game(game, players):
+    '''
+    Drives one Game between connected players, awaiting each query. Returns the final bankrolls by player name.
+    '''
+    plays = game.play(players)
+    action = None
+    try:
+        while True:
+            player, round_state, player_message = plays.send(action)
+            action = await player.query_async(round_state, player_message, game.log)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def play_match(match, limit):
+    '''
+    Plays NUM_GAMES games of one match, given as a dict of the PLAYER_* and GAME_LOG_FILENAME config values.
+    Returns the bankrolls by player name summed over the games.
+    '''
+    async with limit:
+        names = [match.get('PLAYER_1_NAME', engine.PLAYER_1_NAME), match.get('PLAYER_2_NAME', engine.PLAYER_2_NAME)]
+        paths = [match.get('PLAYER_1_PATH', engine.PLAYER_1_PATH), match.get('PLAYER_2_PATH', engine.PLAYER_2_PATH)]
+        log_filename = match.get('GAME_LOG_FILENAME', engine.GAME_LOG_FILENAME)
+        log_directory = os.path.dirname(log_filename)
+        if log_directory:
+            os.makedirs(log_directory, exist_ok=True)
+        players = [AsyncPlayer(name, path, log_directory) for name, path in zip(names, paths)]
+        await asyncio.gather(*[player.start() for player in players])
+        totals = dict.fromkeys(names, 0)
+        for game_num in range(1, engine.NUM_GAMES + 1):
+            game = Game(log_filename if engine.NUM_GAMES == 1 else log_filename + '_' + str(game_num), names)
+            if game.checkpoint is not None:
+                # as in Game.run, the resumed pokerbots are told where the game stands
+                await asyncio.gather(*[player.reset_async(game.checkpoint['round'] + 1,
+                                                          game.checkpoint['bankrolls'][player.name],
+                                                          game.checkpoint['game_clocks'][player.name])
+                                       for player in players])
+            elif game_num > 1:
+                await asyncio.gather(*[player.reset_async() for player in players])
+            print('Writing', game.log.filename)
+            bankrolls = await play_game(game, players)
+            for name in names:
+                totals[name] += bankrolls[name]
+        await asyncio.gather(*[player.stop_async() for player in players])
+        return totals
+
+
+async def play_matches(matches, concurrency):
+    '''
+    Plays matches on the running event loop, at most concurrency at a time.
+    '''
+    limit = asyncio.Semaphore(concurrency or len(matches) or 1)
+    return await asyncio.gather(*[play_match(match, limit) for match in matches])
+
+
+def run_matches(matches, concurrency=None):
+    '''
+    Plays matches concurrently in this process and returns their results in the same order.
+    Other config overrides apply to every match, so set them on the engine module first.
+    '''
+    return asyncio.run(play_matches(matches, concurrency))
+
+
+def parse_args():
+    '''
+    Parses the async engine options.
+    '''
+    parser = argparse.ArgumentParser(prog='python3 async_engine.py')
+    parser.add_argument('--matches', type=int, default=4, help='Copies of the configured match to play, defaults to 4')
+    parser.add_argument('--concurrency', type=int, help='Most matches in progress at once, defaults to all of them')
+    parser.add_argument('--logs', type=str, default='./async_matches', help='Directory for match logs, defaults to ./async_matches')
+    return parser.parse_args()
+
+
+def main():
+    '''
+    Plays copies of the match in config.py side by side and reports the combined throughput.
+    '''
+    args = parse_args()
+    matches = [{'GAME_LOG_FILENAME': os.path.join(args.logs, 'match_' + str(match_num), 'gamelog')}
+               for match_num in range(1, args.matches + 1)]
+    start_time = time.perf_counter()
+    results = run_matches(matches, args.concurrency)
+    elapsed = time.perf_counter() - start_time
+    for match, bankrolls in zip(matches, results):
+        print(match['GAME_LOG_FILENAME'], ', '.join('{} ({})'.format(name, bankroll) for name, bankroll in bankrolls.items()))
+    rounds = args.matches * engine.NUM_GAMES * engine.NUM_ROUNDS
+    print('Played {} rounds in {:.2f} s ({:.0f} rounds/s)'.format(rounds, elapsed, rounds / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+'''
+Benchmark pokerbot that checks or calls every decision, so every round reaches showdown.
+'''
+from skeleton.actions import CallAction, CheckAction
+from skeleton.bot import Bot
+from skeleton.runner import parse_args, run_bot
+
+
+class Player(Bot):
+    '''
+    A pokerbot.
+    '''
+
+    def handle_new_round(self, game_state, round_state, active):
+        pass
+
+    def handle_round_over(self, game_state, terminal_state, active):
+        pass
+
+    def get_action(self, game_state, round_state, active):
+        '''
+        Checks when it can, otherwise calls.
+        '''
+        return CheckAction() if CheckAction in round_state.legal_actions() else CallAction()
+
+
+if __name__ == '__main__':
+    run_bot(Player(), parse_args())
@@ -0,0 +1,175 @@
+'''
+Throughput benchmark of engine.Game in several match-ups, with a breakdown of where the time goes.
+Run from the repository root: python3 benchmarks/engine_benchmark.py [--output FILE] [--baseline FILE]
+
+Each match-up plays one seeded game over the configured transport and reports rounds/s and seconds in:
+bot compute (the bot processes' CPU time, read from /proc, so Linux only), socket round-trip (decision
+time the bots did not spend computing), RoundState transitions, eval7 showdown evaluation, log
+formatting (log_round_state, log_action and log_terminal_state with PCARDS) and everything else.
+'''
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import engine
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# name, player 1 path, player 2 path, rounds
+SETUPS = [
+    ('fold_vs_fold', 'players/fold_bot', 'players/fold_bot', 1000),
+    ('check_down', 'benchmarks/bots/check_bot', 'benchmarks/bots/check_bot', 1000),
+    ('monte_carlo', 'players/lec2', 'players/monte_carlo_1', 100),
+]
+
+
+class ShowdownTimer():
+    '''
+    Wraps RoundState.showdown to add up the time spent in it, which is part of the transition time.
+    '''
+
+    def __init__(self):
+        self.seconds = 0.
+        self.showdown = engine.RoundState.showdown
+
+    def __enter__(self):
+        showdown = self.showdown
+
+        def timed_showdown(round_state):
+            start_time = time.perf_counter()
+            try:
+                return showdown(round_state)
+            finally:
+                self.seconds += time.perf_counter() - start_time
+        engine.RoundState.showdown = timed_showdown
+        return self
+
+    def __exit__(self, *exc_info):
+        engine.RoundState.showdown = self.showdown
+
+
+def bot_cpu(players):
+    '''
+    Returns the CPU seconds used so far by each pokerbot process, None where /proc cannot tell.
+    '''
+    usage = [engine.read_process_usage(player.bot_subprocess.pid) if player.bot_subprocess is not None else None
+             for player in players]
+    return [None if sample is None else sample['user'] + sample['system'] for sample in usage]
+
+
+def run_setup(name, path_1, path_2, rounds, log_directory):
+    '''
+    Plays one game between the two pokerbots and returns its throughput and time breakdown.
+    Building and connecting the pokerbots is timed separately and left out of the rounds/s.
+    '''
+    log_filename = os.path.join(log_directory, name, 'gamelog')
+    os.makedirs(os.path.dirname(log_filename), exist_ok=True)
+    vars(engine).update({
+        'PLAYER_1_NAME': 'A', 'PLAYER_1_PATH': os.path.join(REPOSITORY, path_1),
+        'PLAYER_2_NAME': 'B', 'PLAYER_2_PATH': os.path.join(REPOSITORY, path_2),
+        'GAME_LOG_FILENAME': log_filename, 'NUM_ROUNDS': rounds, 'SEED': 0, 'LATENCY_REPORT': True,
+        'RESOURCE_REPORT': False, 'EARLY_STOP': False, 'CHECKPOINT_INTERVAL': 0, 'RESUME': False,
+        'IN_PROCESS': False, 'NUM_GAMES': 1, 'NUM_TABLES': 1,
+    })
+    start_time = time.perf_counter()
+    players = engine.start_players()
+    startup = time.perf_counter() - start_time
+    game = engine.Game(log_filename)
+    start_cpu = bot_cpu(players)
+    with ShowdownTimer() as showdown_timer:
+        start_time = time.perf_counter()
+        plays = game.play(players)
+        action = None
+        try:
+            while True:
+                player, round_state, player_message = plays.send(action)
+                action = player.query(round_state, player_message, game.log)
+        except StopIteration:
+            pass
+        elapsed = time.perf_counter() - start_time
+    end_cpu = bot_cpu(players)
+    for player in players:
+        player.stop()
+    decisions = sum(seconds for player in players for _, _, seconds in player.decision_times)
+    compute = None
+    if None not in start_cpu + end_cpu:
+        compute = sum(end - start for start, end in zip(start_cpu, end_cpu))
+    log_time = sum(game.latency_report.engine_times['log'])
+    transition = sum(game.latency_report.engine_times['transition']) - showdown_timer.seconds
+    breakdown = {
+        'bot_compute': compute,
+        'round_trip': None if compute is None else max(decisions - compute, 0.),
+        'decisions': decisions,
+        'transitions': transition,
+        'showdown': showdown_timer.seconds,
+        'log_formatting': log_time,
+        'other': elapsed - decisions - log_time - transition - showdown_timer.seconds,
+    }
+    return {
+        'rounds': rounds,
+        'startup_seconds': round(startup, 4),
+        'seconds': round(elapsed, 4),
+        'rounds_per_second': round(rounds / elapsed, 1),
+        'breakdown_seconds': {key: None if value is None else round(value, 4) for key, value in breakdown.items()},
+    }
+
+
+def format_results(results, baseline=None):
+    '''
+    Renders the results as a table, with the change in rounds/s against a baseline run if one is given.
+    '''
+    columns = ['bot_compute', 'round_trip', 'transitions', 'showdown', 'log_formatting', 'other']
+    lines = ['{:>14}{:>10}{:>10}'.format('setup', 'rounds/s', 'change') +
+             ''.join('{:>16}'.format(column) for column in columns)]
+    for name, result in results.items():
+        change = ''
+        if baseline is not None and name in baseline:
+            change = '{:+.1%}'.format(result['rounds_per_second'] / baseline[name]['rounds_per_second'] - 1)
+        cells = []
+        for column in columns:
+            seconds = result['breakdown_seconds'][column]
+            cells.append('{:>16}'.format('n/a' if seconds is None else '{:.1%}'.format(seconds / result['seconds'])))
+        lines.append('{:>14}{:>10.0f}{:>10}'.format(name, result['rounds_per_second'], change) + ''.join(cells))
+    return '\n'.join(lines)
+
+
+def parse_args():
+    '''
+    Parses the benchmark options.
+    '''
+    parser = argparse.ArgumentParser(prog='python3 benchmarks/engine_benchmark.py')
+    parser.add_argument('--output', type=str, default=os.path.join(REPOSITORY, 'benchmarks', 'engine_benchmark.json'),
+                        help='Where to write the results as JSON, defaults to benchmarks/engine_benchmark.json')
+    parser.add_argument('--baseline', type=str, help='Results JSON of an earlier run to compare rounds/s against')
+    parser.add_argument('--setups', type=str, nargs='+', choices=[setup[0] for setup in SETUPS],
+                        help='Match-ups to run, defaults to all of them')
+    parser.add_argument('--rounds-scale', type=float, default=1., help='Multiplies every match-up\'s rounds')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['setups']
+    results = {}
+    with tempfile.TemporaryDirectory() as log_directory:
+        for name, path_1, path_2, rounds in SETUPS:
+            if args.setups is None or name in args.setups:
+                print('Running', name, file=sys.stderr)
+                with open(os.devnull, 'w') as devnull:
+                    stdout, sys.stdout = sys.stdout, devnull  # the engine's progress output
+                    try:
+                        results[name] = run_setup(name, path_1, path_2, max(int(rounds * args.rounds_scale), 1),
+                                                  log_directory)
+                    finally:
+                        sys.stdout = stdout
+    print(format_results(results, baseline))
+    with open(args.output, 'w') as output_file:
+        json.dump({'python': platform.python_version(), 'transport': engine.TRANSPORT,
+                   'wire_protocol': engine.WIRE_PROTOCOL, 'setups': results}, output_file, indent=2)
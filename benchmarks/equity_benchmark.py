@@ -0,0 +1,202 @@
+'''
+Checks the shared skeleton/equity.py against the bots' old calc_strength loops and times both.
+Run from the repository root: python3 benchmarks/equity_benchmark.py [reference samples]
+'''
+import random
+import sys
+import os
+import time
+import eval7
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'players', 'lec2'))
+from skeleton.equity import EquitySamples, estimate, swap_probability
+from skeleton.states import FLOP_PERCENT, TURN_PERCENT
+
+# hole, board, street; the swap chance follows from the street
+CASES = [
+    (['As', 'Ad'], [], 0),
+    (['7c', '2d'], [], 0),
+    (['As', 'Kd'], ['2c', '7h', 'Td'], 3),
+    (['9h', '8h'], ['7h', '6c', '2h'], 3),
+    (['Qs', 'Js'], ['Ts', '4d', '4c', '2s'], 4),
+    (['5c', '5d'], ['Kh', 'Qd', '8s', '3c', '2h'], 5),
+]
+
+
+def lec2_calc_strength(hole, iters):
+    '''
+    lec2's calc_strength as it was, with a fixed iteration count instead of its time budget: board-less,
+    it deals a whole board every time.
+    '''
+    deck = eval7.Deck() #deck of cards
+    hole_cards = [eval7.Card(card) for card in hole] #list of our hole cards
+
+    for card in hole_cards:
+        deck.cards.remove(card)
+
+    score = 0
+
+    for _ in range(iters):
+        deck.shuffle()
+
+        _COMM = 5
+        _OPP = 2
+
+        draw = deck.peek(_COMM+_OPP)
+
+        opp_hole = draw[:_OPP]
+        community = draw[_OPP:]
+
+        our_hand = hole_cards + community
+        opp_hand = opp_hole + community
+
+        our_hand_value = eval7.evaluate(our_hand)
+        opp_hand_value = eval7.evaluate(opp_hand)
+
+        if our_hand_value > opp_hand_value:
+            score += 2
+
+        if our_hand_value == opp_hand_value:
+            score += 1
+
+        else:
+            score += 0
+
+    hand_strength = score/(2*iters)
+
+    return hand_strength
+
+
+def improved_bot_calc_strength(hole, iters, community = []):
+    '''
+    improved_bot's calc_strength as it was: completes the board it is given.
+    '''
+    deck = eval7.Deck() # deck of cards
+    hole_cards = [eval7.Card(card) for card in hole] # our hole cards in eval7 friendly format
+
+    if community != []:
+        community_cards = [eval7.Card(card) for card in community]
+        for card in community_cards: #removing the current community cards from the deck
+            deck.cards.remove(card)
+
+    for card in hole_cards: #removing our hole cards from the deck
+        deck.cards.remove(card)
+
+    score = 0
+
+    for _ in range(iters): # MC the probability of winning
+        deck.shuffle()
+
+        _COMM = 5 - len(community)
+        _OPP = 2
+
+        draw = deck.peek(_COMM + _OPP)
+
+        opp_hole = draw[:_OPP]
+        alt_community = draw[_OPP:]
+
+        if community == []:
+            our_hand = hole_cards  + alt_community
+            opp_hand = opp_hole  + alt_community
+        else:
+            our_hand = hole_cards + community_cards + alt_community
+            opp_hand = opp_hole + community_cards + alt_community
+
+        our_hand_value = eval7.evaluate(our_hand)
+        opp_hand_value = eval7.evaluate(opp_hand)
+
+        if our_hand_value > opp_hand_value:
+            score += 2
+
+        if our_hand_value == opp_hand_value:
+            score += 1
+
+        else:
+            score += 0
+
+    hand_strength = score/(2*iters) # win probability
+
+    return hand_strength
+
+
+def swap_calc_strength(hole, board, iters, swap):
+    '''
+    monte_carlo_1's calc_strength loop plus swaps as the engine deals them:
+    a swapped card is replaced from the deck and never comes back. Returns the equity and its variance.
+    '''
+    deck = eval7.Deck()
+    hole_cards = [eval7.Card(card) for card in hole]
+    board_cards = [eval7.Card(card) for card in board]
+    for card in hole_cards + board_cards:
+        deck.cards.remove(card)
+    score = 0
+    squares = 0
+    for _ in range(iters):
+        deck.shuffle()
+        draw = deck.peek(4 + 5 - len(board))
+        our_hole = [draw[2 + i] if random.random() < swap else hole_cards[i] for i in range(2)]
+        opp_hole = draw[:2]
+        comm = draw[4:] + board_cards
+        our_hand_value = eval7.evaluate(our_hole + comm)
+        opp_hand_value = eval7.evaluate(opp_hole + comm)
+        outcome = 2 if our_hand_value > opp_hand_value else 1 if our_hand_value == opp_hand_value else 0
+        score += outcome
+        squares += outcome * outcome
+    mean = score / (2 * iters)
+    return mean, (squares / (4 * iters) - mean * mean) / iters
+
+
+def compare(label, expected, expected_variance, actual, actual_variance):
+    '''
+    Reports one comparison and asserts that the estimates agree within four standard errors.
+    '''
+    error = (expected_variance + actual_variance) ** 0.5
+    print('{:>40}: loop {:.4f}, estimate {:.4f} (+- {:.4f})'.format(label, expected, actual, error))
+    assert abs(expected - actual) < 4 * error, (label, expected, actual)
+
+
+def check(reference_samples):
+    '''
+    Compares estimate with each old loop on the cases it handled: lec2's preflop loop without a board,
+    improved_bot's loop on every street and the swapping loop on every street with the engine's swap chances,
+    also continuing a smaller estimate's samples.
+    The old loops score 0, 1/2 or 1, so p (1 - p) / samples bounds their variance.
+    '''
+    for hole, board, street in CASES:
+        label = ' '.join(hole) + ' | ' + ' '.join(board)
+        if not board:
+            expected = lec2_calc_strength(hole, reference_samples)
+            compare('lec2 ' + label, expected, expected * (1 - expected) / reference_samples,
+                    *estimate(hole, iters=reference_samples))
+        expected = improved_bot_calc_strength(hole, reference_samples, board)
+        compare('improved_bot ' + label, expected, expected * (1 - expected) / reference_samples,
+                *estimate(hole, board, iters=reference_samples))
+        swap = swap_probability(street, FLOP_PERCENT, TURN_PERCENT)
+        expected, expected_variance = swap_calc_strength(hole, board, reference_samples, swap)
+        compare('swaps {:.3f} '.format(swap) + label, expected, expected_variance,
+                *estimate(hole, board, swap, iters=reference_samples))
+        # a tenth sampled ahead, as precompute does, then topped up to the full count
+        samples = EquitySamples(hole, board, swap)
+        estimate(hole, board, swap, iters=reference_samples // 10, samples=samples)
+        compare('pooled swaps {:.3f} '.format(swap) + label, expected, expected_variance,
+                *estimate(hole, board, swap, iters=reference_samples, samples=samples))
+    print('Checked', len(CASES), 'cases: estimate agrees with the loops')
+
+
+def benchmark(calls=200):
+    '''
+    Times the old loop at its usual 100 samples against the default estimate, which takes thousands.
+    '''
+    for name, function in (('calc_strength x100', lambda hole, board, swap: swap_calc_strength(hole, board, 100, swap)),
+                           ('estimate', lambda hole, board, swap: estimate(hole, board, swap))):
+        start_time = time.perf_counter()
+        for _ in range(calls):
+            for hole, board, street in CASES:
+                function(hole, board, swap_probability(street, FLOP_PERCENT, TURN_PERCENT))
+        elapsed = (time.perf_counter() - start_time) / (calls * len(CASES))
+        print('{:>18}: {:.3f} ms per call'.format(name, elapsed * 1000))
+
+
+if __name__ == '__main__':
+    check(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
+    benchmark()
@@ -0,0 +1,194 @@
+'''
+Replays a recorded game log through a pokerbot and reports its decision latency by street.
+Run from the repository root: python3 benchmarks/replay_benchmark.py players/lec2 [gamelog] [--name A]
+
+The log is turned back into the exact messages each seat received from the engine, and the pokerbot's
+own skeleton Runner reads them from an in-memory socket file, so no engine or opponent is needed. The bot
+answers every query but the recorded action is what gets played, and the game clock in each message is
+charged with the bot's response time as the engine would. Every get_action call is timed.
+'''
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import engine
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_LOG = os.path.join(REPOSITORY, 'gamelog_parser', 'gamelogs', 'grandcentral1.txt')
+ACTION_CODES = {' calls': 'C', ' checks': 'K', ' folds': 'F'}
+
+
+def read_streams(lines, rounds=None):
+    '''
+    Rebuilds the messages the engine sent to each player in a game log, as lists of clauses without
+    the game clock. Returns them by player name.
+    '''
+    streams = {}
+    pending = {}
+    seats = {}
+    timed_out = set()
+
+    def query(name):
+        if name not in timed_out:  # the engine stops messaging a pokerbot that ran out of time
+            streams[name].append(pending[name])
+        pending[name] = []
+
+    def broadcast(clause):
+        for messages in pending.values():
+            messages.append(clause)
+
+    cards = lambda line: ','.join(line[line.index('[') + 1:line.index(']')].split())
+    for line in lines:
+        line = line.rstrip('\n')
+        if line.startswith('Round #'):
+            if rounds is not None and int(line[len('Round #'):line.index(',')]) > rounds:
+                break
+        elif ' posts the blind of ' in line:
+            name, amount = line.split(' posts the blind of ')
+            seats[name] = 0 if int(amount) == engine.SMALL_BLIND else 1
+            streams.setdefault(name, [])
+        elif ' dealt ' in line:
+            name = line[:line.index(' dealt ')]
+            pending[name] = ['P' + str(seats[name]), 'H' + cards(line)]
+        elif line.startswith(tuple(name + ' ' for name in engine.STREET_NAMES)):
+            broadcast('B' + cards(line))
+        elif "'s hand: " in line:
+            pending[line[:line.index("'s hand: ")]].append('U' + cards(line))
+        elif ' bets ' in line or ' raises to ' in line:
+            name = line.split(' ')[0]
+            query(name)
+            broadcast('R' + line.split(' ')[-1])
+        elif line.endswith(tuple(ACTION_CODES)):
+            name, _, action = line.rpartition(' ')
+            query(name)
+            broadcast(ACTION_CODES[' ' + action])
+        elif ' shows ' in line:
+            name = line[:line.index(' shows ')]
+            for opponent in pending:
+                if opponent != name:
+                    pending[opponent].append('O' + cards(line))
+        elif ' awarded ' in line:
+            name, delta = line.split(' awarded ')
+            pending[name].append('D' + delta)
+            query(name)
+        elif line.endswith(' ran out of time'):
+            timed_out.add(line[:-len(' ran out of time')])
+    return streams
+
+
+class ReplayFile():
+    '''
+    An in-memory socket file: plays back messages stamped with the game clock and charges the clock
+    with the time from each message to its response, as the engine does.
+    '''
+
+    def __init__(self, messages, game_clock):
+        self.messages = iter(messages)
+        self.game_clock = game_clock
+        self.sent_time = None
+        self.responses = []
+
+    def readline(self):
+        message = next(self.messages, None)
+        self.sent_time = time.perf_counter()
+        if message is None:
+            return 'Q\n'
+        return ' '.join(['T{:.3f}'.format(self.game_clock)] + message) + '\n'
+
+    def write(self, response):
+        self.game_clock -= time.perf_counter() - self.sent_time
+        self.responses.append(response)
+
+    def flush(self):
+        pass
+
+
+def timed(get_action, times):
+    '''
+    Wraps a pokerbot's get_action to record its duration by street.
+    '''
+    def timed_get_action(game_state, round_state, active):
+        start_time = time.perf_counter()
+        action = get_action(game_state, round_state, active)
+        street = 'Preflop' if round_state.street == 0 else engine.STREET_NAMES[round_state.street - 3]
+        times.setdefault(street, []).append(time.perf_counter() - start_time)
+        return action
+    return timed_get_action
+
+
+def replay(path, messages, game_clock, precompute=False):
+    '''
+    Plays one player's messages through a fresh pokerbot from path.
+    Returns its get_action times by street, the replay's wall time and the game clock left.
+    '''
+    pokerbot, runner_class = engine.load_bot(path)
+    times = {}
+    pokerbot.get_action = timed(pokerbot.get_action, times)
+
+    class ReplayRunner(runner_class):
+        '''
+        Without a connection to poll, precompute work either runs to completion between messages or not at all.
+        '''
+
+        def think(self):
+            work, self.work = self.work, None
+            if precompute and work is not None:
+                for _ in work:
+                    pass
+
+    socketfile = ReplayFile(messages, game_clock)
+    cwd = os.getcwd()
+    os.chdir(path)  # as a pokerbot process would run
+    try:
+        start_time = time.perf_counter()
+        ReplayRunner(pokerbot, socketfile).run()
+        elapsed = time.perf_counter() - start_time
+    finally:
+        os.chdir(cwd)
+    return times, elapsed, socketfile.game_clock
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python3 benchmarks/replay_benchmark.py')
+    parser.add_argument('bot', help='pokerbot directory, e.g. players/lec2')
+    parser.add_argument('gamelog', nargs='?', default=DEFAULT_LOG, help='game log to replay')
+    parser.add_argument('--name', action='append', help='replay only this player of the log (repeatable)')
+    parser.add_argument('--rounds', type=int, default=None, help='replay only the first rounds')
+    parser.add_argument('--game-clock', type=float, default=engine.STARTING_GAME_CLOCK,
+                        help='game clock at the start of the replay')
+    parser.add_argument('--precompute', action='store_true',
+                        help="run the pokerbot's precompute work between messages, untimed")
+    parser.add_argument('--output', help='also write the results as JSON to this file')
+    args = parser.parse_args()
+    with open(args.gamelog) as log_file:
+        streams = read_streams(log_file, args.rounds)
+    results = {}
+    for name in args.name or sorted(streams):
+        if name not in streams:
+            parser.error('no player {} in {}'.format(name, args.gamelog))
+        times, elapsed, game_clock = replay(os.path.abspath(args.bot), streams[name], args.game_clock, args.precompute)
+        results[name] = {
+            'messages': len(streams[name]),
+            'seconds': elapsed,
+            'game_clock': game_clock,
+            'all': engine.summarize_times([seconds for street in times.values() for seconds in street]),
+            'streets': {street: engine.summarize_times(times[street])
+                        for street in ['Preflop'] + engine.STREET_NAMES if street in times},
+        }
+        print('{} as {}: {} messages in {:.3f}s, {:.3f}s of game clock left'.format(
+            args.bot, name, len(streams[name]), elapsed, game_clock))
+        print('{:>10}{:>8}{:>10}{:>10}{:>10}{:>10}{:>10}'.format('street', 'count', 'mean', 'p50', 'p95', 'p99', 'max'))
+        for street, summary in list(results[name]['streets'].items()) + [('all', results[name]['all'])]:
+            if summary['count']:
+                print('{:>10}{:>8}'.format(street, summary['count']) + ''.join(
+                    '{:>8.3f}ms'.format(summary[key] * 1000) for key in ('mean', 'p50', 'p95', 'p99', 'max')))
+    if args.output is not None:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
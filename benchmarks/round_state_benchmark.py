@@ -0,0 +1,105 @@
+'''
+Micro-benchmark of random legal transitions through the engine's RoundState and CompactRoundState.
+Run from the repository root: python3 benchmarks/round_state_benchmark.py [transitions]
+'''
+import random
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import engine
+from compact_state import CompactRoundState, EVAL7_CARDS, FOLD, CALL, CHECK, RAISE
+
+# legal actions in a fixed order so both implementations draw the same choices
+ENGINE_ACTIONS = [(engine.FoldAction, FOLD), (engine.CallAction, CALL),
+                  (engine.CheckAction, CHECK), (engine.RaiseAction, RAISE)]
+
+
+def choose(rng, options, bounds):
+    '''
+    Picks one legal option and, for raises, an amount within bounds.
+    '''
+    option = options[int(rng.random() * len(options))]
+    amount = rng.randint(*bounds) if option[1] == RAISE else 0
+    return option, amount
+
+
+def engine_round(rng, deck, swap_rolls):
+    '''
+    Plays one round of random legal actions through the engine's RoundState.
+    Returns the deltas and the number of transitions.
+    '''
+    cards = [EVAL7_CARDS[card] for card in deck]
+    deck = ([], engine.CardDeck(cards), (swap_rolls[:4], swap_rolls[4:]))
+    hands = [deck[1].deal(2), deck[1].deal(2)]
+    pips = [engine.SMALL_BLIND, engine.BIG_BLIND]
+    stacks = [engine.STARTING_STACK - engine.SMALL_BLIND, engine.STARTING_STACK - engine.BIG_BLIND]
+    round_state = engine.RoundState(0, 0, pips, stacks, hands, deck, None)
+    transitions = 0
+    while not isinstance(round_state, engine.TerminalState):
+        legal_actions = round_state.legal_actions()
+        options = [option for option in ENGINE_ACTIONS if option[0] in legal_actions]
+        bounds = round_state.raise_bounds() if engine.RaiseAction in legal_actions else None
+        (action, _), amount = choose(rng, options, bounds)
+        round_state = round_state.proceed(action(amount) if action is engine.RaiseAction else action())
+        transitions += 1
+    return tuple(round_state.deltas), transitions
+
+
+def compact_round(rng, state):
+    '''
+    Plays the dealt round of random legal actions through a CompactRoundState.
+    Returns the deltas and the number of transitions.
+    '''
+    transitions = 0
+    done = False
+    while not done:
+        legal_actions = state.legal_actions()
+        options = [option for option in ENGINE_ACTIONS if option[1] & legal_actions]
+        bounds = state.raise_bounds() if legal_actions & RAISE else None
+        (_, action), amount = choose(rng, options, bounds)
+        done = state.proceed(action, amount)
+        transitions += 1
+    return state.deltas, transitions
+
+
+def check(rounds, seed=0):
+    '''
+    Plays the same deals and choices through both implementations and compares the payoffs.
+    '''
+    deal_rng = random.Random(seed)
+    state = CompactRoundState()
+    for _ in range(rounds):
+        state.deal(deal_rng)
+        deck = list(state.deck)
+        swap_rolls = list(state.swap_rolls)
+        choice_seed = deal_rng.random()
+        expected = engine_round(random.Random(choice_seed), deck, swap_rolls)
+        actual = compact_round(random.Random(choice_seed), state)
+        assert expected == actual, (deck, swap_rolls, expected, actual)
+    print('Checked', rounds, 'rounds: payoffs match the engine')
+
+
+def benchmark(transitions, seed=0):
+    '''
+    Times random legal transitions through both implementations.
+    '''
+    for name in ('RoundState', 'CompactRoundState'):
+        rng = random.Random(seed)
+        state = CompactRoundState()
+        done = 0
+        start_time = time.perf_counter()
+        while done < transitions:
+            state.deal(rng)
+            if name == 'RoundState':
+                done += engine_round(rng, state.deck, state.swap_rolls)[1]
+            else:
+                done += compact_round(rng, state)[1]
+        elapsed = time.perf_counter() - start_time
+        print('{:>18}: {} transitions in {:.2f}s, {:,.0f} transitions/s'.format(name, done, elapsed, done / elapsed))
+
+
+if __name__ == '__main__':
+    check(10000)
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,99 @@
+'''
+Start-up benchmark of every pokerbot under players/: time to connect, time to its first action
+and its heaviest imports, also written to benchmarks/startup_benchmark.json.
+Run from the repository root: python3 benchmarks/startup_benchmark.py [launches]
+'''
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLAYERS = os.path.join(REPOSITORY, 'players')
+OUTPUT = os.path.join(REPOSITORY, 'benchmarks', 'startup_benchmark.json')
+# the engine's first message to the small blind: game clock, seat and hole cards
+FIRST_MESSAGE = 'T30.000 P0 HAs,Kd\n'
+
+
+def launch(path, command):
+    '''
+    Starts the pokerbot once and returns the seconds until it connects and until it answers its first action.
+    '''
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server_socket:
+        server_socket.bind(('', 0))
+        server_socket.settimeout(10.)
+        server_socket.listen()
+        start_time = time.perf_counter()
+        bot = subprocess.Popen(command + [str(server_socket.getsockname()[1])], cwd=path,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        client_socket, _ = server_socket.accept()
+        connected = time.perf_counter() - start_time
+    with client_socket:
+        socketfile = client_socket.makefile('rw')
+        socketfile.write(FIRST_MESSAGE)
+        socketfile.flush()
+        socketfile.readline()
+        answered = time.perf_counter() - start_time
+        socketfile.write('Q\n')
+        socketfile.flush()
+    bot.wait()
+    return connected, answered
+
+
+def heaviest_imports(path, command, count=3):
+    '''
+    Returns the top-level imports of player.py that take the longest, as (module, seconds).
+    '''
+    output = subprocess.run(command[:1] + ['-X', 'importtime', '-c', 'import player'], cwd=path,
+                            capture_output=True, text=True).stderr
+    # -X importtime lists a module after everything it imports, indented two spaces per level
+    imports = []
+    children = []
+    for line in output.splitlines():
+        fields = line.split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # the header line
+        module = fields[2].rstrip()
+        depth = (len(module) - len(module.lstrip())) // 2
+        if depth == 1:
+            children.append((module.strip(), int(fields[1]) / 1e6))
+        elif depth == 0:
+            if module.strip() == 'player':
+                imports = children
+            children = []
+    return sorted(imports, key=lambda entry: entry[1], reverse=True)[:count]
+
+
+def benchmark(launches):
+    '''
+    Measures every pokerbot and returns the medians by name.
+    '''
+    results = {}
+    for name in sorted(os.listdir(PLAYERS)):
+        path = os.path.join(PLAYERS, name)
+        try:
+            with open(os.path.join(path, 'commands.json')) as commands_file:
+                command = json.load(commands_file)['run']
+        except (OSError, KeyError, ValueError):
+            continue
+        timings = [launch(path, command) for _ in range(launches)]
+        results[name] = {
+            'connect_seconds': round(statistics.median(connected for connected, _ in timings), 4),
+            'first_action_seconds': round(statistics.median(answered for _, answered in timings), 4),
+            'heaviest_imports': [[module, round(seconds, 4)] for module, seconds in heaviest_imports(path, command)],
+        }
+    return results
+
+
+if __name__ == '__main__':
+    results = benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
+    print('{:>18}{:>12}{:>14}  {}'.format('pokerbot', 'connect', 'first action', 'heaviest imports'))
+    for name, result in results.items():
+        print('{:>18}{:>10.1f}ms{:>12.1f}ms  {}'.format(
+            name, result['connect_seconds'] * 1000, result['first_action_seconds'] * 1000,
+            ', '.join('{} {:.1f}ms'.format(module, seconds * 1000) for module, seconds in result['heaviest_imports'])))
+    with open(OUTPUT, 'w') as output_file:
+        json.dump(results, output_file, indent=2)
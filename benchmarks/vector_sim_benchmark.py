@@ -0,0 +1,116 @@
+'''
+Checks vector_sim against eval7 and CompactRoundState, then times the batch simulator.
+Run from the repository root: python3 benchmarks/vector_sim_benchmark.py [rounds]
+'''
+import sys
+import os
+import time
+import eval7
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import vector_sim
+from compact_state import CompactRoundState, EVAL7_CARDS, FOLD, CALL, CHECK, RAISE
+
+
+def scripted_choice(key, legal, bounds):
+    '''
+    Picks an action from a number derived from the position, so both simulators can replay the same choices.
+    Returns the action and the raise-to amount.
+    '''
+    passive = CHECK if legal & CHECK else CALL
+    if key == 0:
+        return (FOLD if legal & FOLD else CHECK), 0
+    if key in (3, 4, 5) and legal & RAISE:
+        low, high = bounds
+        return RAISE, (low if key == 3 else high if key == 4 else (low + high) // 2)
+    return passive, 0
+
+
+def scripted_policy(observation, rng):
+    '''
+    The scripted choices for a batch of observations.
+    '''
+    keys = (observation.hand.sum(axis=1) + observation.street + observation.my_pip) % 7
+    choices = [scripted_choice(key, legal, bounds) for key, legal, bounds in
+               zip(keys, observation.legal, zip(observation.min_raise, observation.max_raise))]
+    return np.array([action for action, _ in choices]), np.array([amount for _, amount in choices])
+
+
+def compact_round(state):
+    '''
+    Plays the dealt round of scripted choices through a CompactRoundState and returns player 0's delta.
+    '''
+    done = False
+    while not done:
+        active = state.button % 2
+        legal = state.legal_actions()
+        key = (state.hands[2 * active] + state.hands[2 * active + 1] + state.street + state.pips[active]) % 7
+        bounds = state.raise_bounds() if legal & RAISE else None
+        done = state.proceed(*scripted_choice(key, legal, bounds))
+    return state.deltas[0]
+
+
+def check_evaluator(hands, seed=0):
+    '''
+    Compares evaluate() with eval7.evaluate on random 7-card hands: every pair must order the same way.
+    '''
+    rng = np.random.default_rng(seed)
+    cards = np.argsort(rng.random((hands, 52)), axis=1)[:, :7]
+    ours = vector_sim.evaluate(cards)
+    theirs = np.array([eval7.evaluate([EVAL7_CARDS[card] for card in row]) for row in cards])
+    order = np.argsort(theirs, kind='stable')
+    ours, theirs = ours[order], theirs[order]
+    assert ((np.diff(ours) > 0) == (np.diff(theirs) > 0)).all() and ((np.diff(ours) == 0) == (np.diff(theirs) == 0)).all()
+    print('Checked', hands, 'hands: evaluate orders them as eval7 does')
+
+
+def check_rules(rounds, seed=0):
+    '''
+    Plays the same deals and scripted choices through BatchRounds and CompactRoundState and compares the payoffs.
+    '''
+    rng = np.random.default_rng(seed)
+    batch = vector_sim.BatchRounds(rounds, rng)
+    deck, swap_rolls = batch.deck.tolist(), batch.swap_rolls.tolist()
+    seat_a = np.arange(rounds) % 2
+    actual = vector_sim.play_rounds(batch, scripted_policy, scripted_policy, rng)
+    actual = np.where(seat_a == 0, actual, -actual)  # back to player 0's
+    state = CompactRoundState()
+    for row in range(rounds):
+        state.start(deck[row], swap_rolls[row])
+        expected = compact_round(state)
+        assert actual[row] == expected, (deck[row], swap_rolls[row], expected, actual[row])
+    print('Checked', rounds, 'rounds: payoffs match CompactRoundState')
+
+
+def benchmark(rounds, seed=0):
+    '''
+    Times the batch simulator with cheap policies, with the Monte Carlo threshold policy and with a sweep
+    of threshold policies sharing their strength estimates.
+    '''
+    matchups = [('check_call vs check_call', vector_sim.check_call_policy, vector_sim.check_call_policy, rounds),
+                ('threshold vs check_call', vector_sim.make_threshold_policy(0.7), vector_sim.check_call_policy,
+                 rounds // 10)]
+    for name, policy_a, policy_b, num_rounds in matchups:
+        rng = np.random.default_rng(seed)
+        start_time = time.perf_counter()
+        vector_sim.simulate(policy_a, policy_b, num_rounds, rng)
+        elapsed = time.perf_counter() - start_time
+        print('{:>26}: {} rounds in {:.2f}s, {:,.0f} rounds/s'.format(name, num_rounds, elapsed, num_rounds / elapsed))
+    # a threshold sweep as vector_sim.py runs it: every grid point on the same deals, sharing strengths
+    strengths = vector_sim.StrengthCache()
+    start_time = time.perf_counter()
+    num_rounds = 0
+    for raise_strength in (0.6, 0.65, 0.7, 0.75, 0.8, 0.85):
+        policy = vector_sim.make_threshold_policy(raise_strength, strengths=strengths)
+        vector_sim.simulate(policy, vector_sim.check_call_policy, rounds // 10, np.random.default_rng(seed))
+        num_rounds += rounds // 10
+    elapsed = time.perf_counter() - start_time
+    print('{:>26}: {} rounds in {:.2f}s, {:,.0f} rounds/s'.format('threshold sweep x6', num_rounds, elapsed,
+                                                                num_rounds / elapsed))
+
+
+if __name__ == '__main__':
+    check_evaluator(100000)
+    check_rules(20000)
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
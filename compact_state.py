@@ -0,0 +1,173 @@
+'''
+Allocation-light round state for large simulations, following the engine's rules.
+'''
+import eval7
+import sys
+import os
+
+sys.path.append(os.getcwd())
+from config import *
+
+# legal actions are returned as a bitmask of these
+FOLD = 1
+CALL = 2
+CHECK = 4
+RAISE = 8
+
+# a round uses at most 4 hole cards, 8 swaps and 5 board cards
+DEAL_DEPTH = 17
+# card codes are 13 * suit + rank, as in the binary game log
+CARD_NAMES = [rank + suit for suit in 'cdhs' for rank in '23456789TJQKA']
+EVAL7_CARDS = [eval7.Card(name) for name in CARD_NAMES]
+
+
+class CompactRoundState():
+    '''
+    Encodes one round of poker as a single mutable object with integer cards.
+
+    proceed() updates the state in place rather than building a new state per action,
+    and the deck is a shuffled list of card codes read through an index. Cards swapped
+    out of a hand go to the bottom of the engine's deck, which a round never reaches,
+    so they are simply dropped here.
+    '''
+    __slots__ = ['button', 'street', 'pips', 'stacks', 'hands', 'board', 'deck', 'top', 'swap_rolls', 'deltas']
+
+    def __init__(self):
+        self.deck = list(range(52))
+        self.pips = [0, 0]
+        self.stacks = [0, 0]
+        self.hands = [0, 0, 0, 0]  # player 0's two cards, then player 1's
+        self.board = []
+        self.swap_rolls = [0.] * 8  # flop swaps, then turn swaps
+        self.deltas = None
+
+    def deal(self, rng):
+        '''
+        Shuffles the deck with rng and starts a new round.
+        Only the cards a round can reach are shuffled into place.
+        '''
+        deck = self.deck
+        random = rng.random
+        for i in range(DEAL_DEPTH):
+            j = i + int(random() * (52 - i))
+            deck[i], deck[j] = deck[j], deck[i]
+        swap_rolls = self.swap_rolls
+        for i in range(8):
+            swap_rolls[i] = random()
+        self.start(self.deck, swap_rolls)
+
+    def start(self, deck, swap_rolls):
+        '''
+        Starts a new round from a given card order and swap rolls.
+        '''
+        if deck is not self.deck:
+            self.deck[:] = deck
+        if swap_rolls is not self.swap_rolls:
+            self.swap_rolls[:] = swap_rolls
+        self.hands[:] = self.deck[:4]
+        self.top = 4
+        del self.board[:]
+        self.button = 0
+        self.street = 0
+        self.pips[0] = SMALL_BLIND
+        self.pips[1] = BIG_BLIND
+        self.stacks[0] = STARTING_STACK - SMALL_BLIND
+        self.stacks[1] = STARTING_STACK - BIG_BLIND
+        self.deltas = None
+
+    def legal_actions(self):
+        '''
+        Returns a bitmask of the active player's legal moves.
+        '''
+        active = self.button % 2
+        continue_cost = self.pips[1-active] - self.pips[active]
+        if continue_cost == 0:
+            # we can only raise the stakes if both players can afford it
+            bets_forbidden = (self.stacks[0] == 0 or self.stacks[1] == 0)
+            return CHECK if bets_forbidden else CHECK | RAISE
+        # similarly, re-raising is only allowed if both players can afford it
+        raises_forbidden = (continue_cost == self.stacks[active] or self.stacks[1-active] == 0)
+        return FOLD | CALL if raises_forbidden else FOLD | CALL | RAISE
+
+    def raise_bounds(self):
+        '''
+        Returns a tuple of the minimum and maximum legal raises.
+        '''
+        active = self.button % 2
+        continue_cost = self.pips[1-active] - self.pips[active]
+        max_contribution = min(self.stacks[active], self.stacks[1-active] + continue_cost)
+        min_contribution = min(max_contribution, continue_cost + max(continue_cost, BIG_BLIND))
+        return (self.pips[active] + min_contribution, self.pips[active] + max_contribution)
+
+    def showdown(self):
+        '''
+        Compares the players' hands and sets the payoffs.
+        '''
+        board = [EVAL7_CARDS[card] for card in self.board]
+        score0 = eval7.evaluate(board + [EVAL7_CARDS[self.hands[0]], EVAL7_CARDS[self.hands[1]]])
+        score1 = eval7.evaluate(board + [EVAL7_CARDS[self.hands[2]], EVAL7_CARDS[self.hands[3]]])
+        if score0 > score1:
+            delta = STARTING_STACK - self.stacks[1]
+        elif score0 < score1:
+            delta = self.stacks[0] - STARTING_STACK
+        else:  # split the pot
+            delta = (self.stacks[0] - self.stacks[1]) // 2
+        self.deltas = (delta, -delta)
+        return True
+
+    def proceed_street(self):
+        '''
+        Resets the players' pips and advances to the next round of betting.
+        Returns True if the round is over.
+        '''
+        if self.street == 5:
+            return self.showdown()
+        if self.street == 0 or self.street == 3:
+            percent = FLOP_PERCENT if self.street == 0 else TURN_PERCENT
+            offset = 0 if self.street == 0 else 4
+            for i in range(4):
+                if self.swap_rolls[offset + i] < percent:
+                    self.hands[i] = self.deck[self.top]
+                    self.top += 1
+        count = 3 if self.street == 0 else 1
+        self.board.extend(self.deck[self.top:self.top + count])
+        self.top += count
+        self.street = 3 if self.street == 0 else self.street + 1
+        self.button = 1
+        self.pips[0] = self.pips[1] = 0
+        return False
+
+    def proceed(self, action, amount=0):
+        '''
+        Applies one action (FOLD, CALL, CHECK or RAISE to amount) by the active player.
+        Returns True if the round is over, in which case deltas holds the payoffs.
+        '''
+        active = self.button % 2
+        if action == FOLD:
+            delta = self.stacks[0] - STARTING_STACK if active == 0 else STARTING_STACK - self.stacks[1]
+            self.deltas = (delta, -delta)
+            return True
+        if action == CALL:
+            if self.button == 0:  # sb calls bb
+                self.button = 1
+                self.pips[0] = self.pips[1] = BIG_BLIND
+                self.stacks[0] = self.stacks[1] = STARTING_STACK - BIG_BLIND
+                return False
+            # both players acted
+            contribution = self.pips[1-active] - self.pips[active]
+            self.stacks[active] -= contribution
+            self.pips[active] += contribution
+            self.button += 1
+            return self.proceed_street()
+        if action == CHECK:
+            if (self.street == 0 and self.button > 0) or self.button > 1:  # both players acted
+                return self.proceed_street()
+            # let opponent act
+            self.button += 1
+            return False
+        # action == RAISE
+        contribution = amount - self.pips[active]
+        self.stacks[active] -= contribution
+        self.pips[active] += contribution
+        self.button += 1
+        return False
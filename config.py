@@ -7,8 +7,44 @@ PLAYER_2_NAME = 'B'
 PLAYER_2_PATH = './players/fold_bot'
 # GAME PROGRESS IS RECORDED HERE
 GAME_LOG_FILENAME = 'gamelog'
+# COMPRESS_GAME_LOG GZIPS THE GAME LOG AS IT IS WRITTEN
+COMPRESS_GAME_LOG = False
+# BINARY_GAME_LOG ALSO WRITES A COMPACT BINARY LOG (GAME_LOG_FILENAME.bin) FOR ANALYSIS
+BINARY_GAME_LOG = False
 # PLAYER_LOG_SIZE_LIMIT IS IN BYTES
 PLAYER_LOG_SIZE_LIMIT = 524288
+# IN_PROCESS IMPORTS BOTH PLAYERS INTO THE ENGINE INSTEAD OF RUNNING commands.json
+# FOR OFFLINE EVALUATION ONLY - THE BOTS SHARE THE ENGINE'S PROCESS
+IN_PROCESS = False
+# TRANSPORT CONNECTS THE BOTS OVER 'tcp' (LOOPBACK), 'unix' (DOMAIN SOCKET) OR 'socketpair' (INHERITED FD)
+TRANSPORT = 'tcp'
+# WIRE_PROTOCOL 'binary' OFFERS BOTS LENGTH-PREFIXED BINARY MESSAGES, THOSE THAT DECLINE STAY ON 'text'
+WIRE_PROTOCOL = 'text'
+# NUM_GAMES > 1 PLAYS THAT MANY GAMES ON THE SAME BOT PROCESSES (LOGGED AS GAME_LOG_FILENAME_#)
+NUM_GAMES = 1
+# NUM_TABLES > 1 PLAYS THAT MANY GAMES AT ONCE ON ONE PROCESS PER BOT (LOGGED AS GAME_LOG_FILENAME_table_#),
+# ONE AFTER ANOTHER IF A BOT DECLINES THEM
+NUM_TABLES = 1
+# SEED FIXES THE DEALS AND SWAPS, NONE PICKS A FRESH ONE (IT IS RECORDED IN THE GAME LOG)
+SEED = None
+# DUPLICATE_DEALS PLAYS EVERY DEAL TWICE WITH THE SEATS REVERSED
+DUPLICATE_DEALS = False
+# LATENCY_REPORT WRITES DECISION AND ENGINE TIMINGS TO GAME_LOG_FILENAME_latency.json
+LATENCY_REPORT = False
+# RESOURCE_REPORT SAMPLES EACH BOT'S CPU TIME AND MEMORY EVERY ROUND INTO GAME_LOG_FILENAME_resources.json (LINUX, NOT IN_PROCESS)
+RESOURCE_REPORT = False
+# EARLY_STOP ENDS A MATCH ONCE ITS WINNER IS DECIDED, BY A SEQUENTIAL PROBABILITY RATIO TEST ON THE
+# PER-ROUND DELTAS (PER-PAIR WITH DUPLICATE_DEALS) OR WHEN THE LEAD CAN NO LONGER BE OVERTURNED
+EARLY_STOP = False
+# THE TEST TELLS A MEAN OF +EARLY_STOP_DELTA CHIPS PER ROUND FROM -EARLY_STOP_DELTA WITH THESE ERROR RATES
+EARLY_STOP_DELTA = 5.
+EARLY_STOP_ALPHA = 0.05
+EARLY_STOP_BETA = 0.05
+EARLY_STOP_MIN_ROUNDS = 100
+# CHECKPOINT_INTERVAL > 0 SAVES THE MATCH TO GAME_LOG_FILENAME.ckpt EVERY THAT MANY ROUNDS
+CHECKPOINT_INTERVAL = 0
+# RESUME CONTINUES AN INTERRUPTED MATCH FROM ITS CHECKPOINT, RUN WITH THE SAME CONFIG
+RESUME = False
 # STARTING_GAME_CLOCK AND TIMEOUTS ARE IN SECONDS
 ENFORCE_GAME_CLOCK = True
 STARTING_GAME_CLOCK = 30.
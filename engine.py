@@ -3,16 +3,25 @@
 DO NOT REMOVE, RENAME, OR EDIT THIS FILE
 '''
 from collections import namedtuple
-from threading import Thread
-from queue import Queue
+from threading import Thread, Lock
+import contextlib
+import importlib
+import traceback
 import time
 import json
+import io
 import subprocess
 import socket
 import eval7
 import sys
 import os
 import random
+import statistics
+import math
+import gzip
+import struct
+import shutil
+import tempfile
 
 sys.path.append(os.getcwd())
 from config import *
@@ -31,6 +40,85 @@ PCARDS = lambda cards: '[{}]'.format(' '.join(map(str, cards)))
 PVALUE = lambda name, value: ', {} ({})'.format(name, value)
 STATUS = lambda players: ''.join([PVALUE(p.name, p.bankroll) for p in players])
 
+# Binary game log layout:
+#
+# a header with the magic bytes PBGL, the format version, the record size and both player names,
+# then one fixed-size record per round holding
+# the round number, the seat 0 (small blind) player as 0 for PLAYER_1 or 1 for PLAYER_2,
+# the street the round ended on, the number of actions and flags (bit 0: actions truncated),
+# swap bits (bit 4 * street + 2 * seat + card, flop swaps then turn swaps),
+# both hands at the preflop, flop and turn as card codes (-1 once the round is over),
+# the board as card codes (-1 if not dealt), the deltas by seat
+# and the actions packed as code << 14 | amount with F, C, K, R coded 0, 1, 2, 3.
+# Card codes are 13 * suit + rank with ranks 2 to A and suits c, d, h, s.
+BINARY_LOG_MAX_ACTIONS = 40
+BINARY_LOG_HEADER = struct.Struct('<4sHH24s24s8x')
+BINARY_LOG_RECORD = struct.Struct('<IBBBBB12b5b2h{}H'.format(BINARY_LOG_MAX_ACTIONS))
+BINARY_ACTION_CODES = {FoldAction: 0, CallAction: 1, CheckAction: 2, RaiseAction: 3}
+CARD_CODE = lambda card: 13 * card.suit + card.rank
+ACTION_CODES = {FoldAction: 'F', CallAction: 'C', CheckAction: 'K', RaiseAction: 'R'}
+
+# Binary wire protocol:
+#
+# offered by the engine with the text line Y1 right after connecting, a pokerbot that answers Y1
+# switches to it and any other answer keeps the text protocol.
+# Each message is a uint16 payload length followed by the clauses, each one an ASCII opcode and
+# fixed arguments: T uint32 milliseconds, P uint8, H U O two card codes, B a uint8 count and
+# card codes, R uint16, D int16, I uint16, N uint32 round and int32 bankroll and none for F C K Q.
+# Card codes are as in the binary game log.
+# Responses are framed the same way and hold a single action clause, or I and action clauses for several tables.
+WIRE_VERSION = 'Y1'
+WIRE_LENGTH = struct.Struct('<H')
+WIRE_ARGUMENTS = {'T': struct.Struct('<I'), 'P': struct.Struct('<B'), 'R': struct.Struct('<H'), 'D': struct.Struct('<h'),
+                  'I': struct.Struct('<H')}
+WIRE_RESET = struct.Struct('<Ii')
+WIRE_CARD_CODES = {rank + suit: 13 * i + j for i, suit in enumerate('cdhs') for j, rank in enumerate('23456789TJQKA')}
+
+
+def encode_frame(clauses):
+    '''
+    Packs a list of text clauses into one binary wire protocol message.
+    '''
+    payload = bytearray()
+    for clause in clauses:
+        opcode = clause[0]
+        payload.append(ord(opcode))
+        if opcode == 'T':
+            payload += WIRE_ARGUMENTS['T'].pack(round(float(clause[1:]) * 1000))
+        elif opcode in WIRE_ARGUMENTS:
+            payload += WIRE_ARGUMENTS[opcode].pack(int(clause[1:]))
+        elif opcode == 'N':
+            round_num, bankroll = map(int, clause[1:].split(',')) if len(clause) > 1 else (1, 0)
+            payload += WIRE_RESET.pack(round_num, bankroll)
+        elif opcode in 'HUOB':
+            cards = clause[1:].split(',')
+            if opcode == 'B':
+                payload.append(len(cards))
+            payload += bytes(WIRE_CARD_CODES[card] for card in cards)
+    return WIRE_LENGTH.pack(len(payload)) + payload
+
+
+def read_response(wire):
+    '''
+    Reads one binary wire protocol response and returns it as text clauses, or '' if the connection closed.
+    '''
+    header = wire.read(WIRE_LENGTH.size)
+    if len(header) < WIRE_LENGTH.size:
+        return ''
+    payload = wire.read(WIRE_LENGTH.unpack(header)[0])
+    clauses = []
+    i = 0
+    while i < len(payload):
+        opcode = chr(payload[i])
+        i += 1
+        if opcode in 'RI':
+            clauses.append(opcode + str(WIRE_ARGUMENTS[opcode].unpack_from(payload, i)[0]))
+            i += WIRE_ARGUMENTS[opcode].size
+        else:
+            clauses.append(opcode)
+    return ' '.join(clauses)
+
+
 # Socket encoding scheme:
 #
 # T#.### the player's game clock
@@ -44,6 +132,7 @@ STATUS = lambda players: ''.join([PVALUE(p.name, p.bankroll) for p in players])
 # B**,**,**,**,** the board cards in common format
 # O**,** the opponent's hand in common format
 # D### the player's bankroll delta from the round
+# N new game on the same connection
 # Q game over
 #
 # Clauses are separated by spaces
@@ -53,6 +142,25 @@ STATUS = lambda players: ''.join([PVALUE(p.name, p.bankroll) for p in players])
 # Action history is sent once, including the player's actions
 
 
+class CardDeck():
+    '''
+    The undealt cards of one round, dealt from the front.
+    '''
+    __slots__ = ['cards']
+
+    def __init__(self, cards):
+        self.cards = cards
+
+    def deal(self, n):
+        dealt = self.cards[:n]
+        del self.cards[:n]
+        return dealt
+
+
+# cards are immutable, so every deal shuffles a copy of one shared list
+FULL_DECK = eval7.Deck().cards
+
+
 def swap(player_card_index, hands, deck):
     '''
     Swaps player's card with a card from the deck.
@@ -65,6 +173,38 @@ def swap(player_card_index, hands, deck):
     return hands, deck
 
 
+def is_bot_module(name):
+    '''
+    Checks whether a module name belongs to a pokerbot's own code rather than the engine's.
+    '''
+    return name == 'player' or name == 'skeleton' or name.startswith('skeleton.')
+
+
+def load_bot(path):
+    '''
+    Imports a pokerbot's Player from its directory and returns it with its skeleton Runner class.
+    Every bot ships its own skeleton package, so the import runs against a clean module table
+    and the engine's modules are restored afterwards.
+    '''
+    saved_modules = {name: module for name, module in sys.modules.items() if is_bot_module(name)}
+    for name in saved_modules:
+        del sys.modules[name]
+    cwd = os.getcwd()
+    sys.path.insert(0, os.path.abspath(path))
+    try:
+        importlib.invalidate_caches()
+        os.chdir(path)  # bots open their data files relative to their own directory
+        pokerbot = importlib.import_module('player').Player()
+        runner_class = importlib.import_module('skeleton.runner').Runner
+    finally:
+        os.chdir(cwd)
+        sys.path.pop(0)
+        for name in [name for name in sys.modules if is_bot_module(name)]:
+            del sys.modules[name]
+        sys.modules.update(saved_modules)
+    return pokerbot, runner_class
+
+
 class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks', 'hands', 'deck', 'previous_state'])):
     '''
     Encodes the game tree for one round of poker.
@@ -117,14 +257,15 @@ class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks'
             return self.showdown()
         new_street = 3 if self.street == 0 else self.street + 1
         new_hands = self.hands.copy()
-        new_deck = eval7.Deck()
-        new_deck.cards = self.deck[1].cards.copy()
+        new_deck = CardDeck(self.deck[1].cards.copy())
         if self.street == 0 or self.street == 3:
+            # the swap rolls are drawn with the deal so that a deal can be replayed exactly
+            swap_rolls = self.deck[2][0 if self.street == 0 else 1]
             for i in range(sum([len(hand) for hand in self.hands])):
-                if random.random() < (FLOP_PERCENT if self.street == 0 else TURN_PERCENT):
+                if swap_rolls[i] < (FLOP_PERCENT if self.street == 0 else TURN_PERCENT):
                     new_hands, new_deck = swap(i, new_hands, new_deck)
         board = self.deck[0] + new_deck.deal(3 if self.street == 0 else 1)
-        return RoundState(1, new_street, [0, 0], self.stacks, new_hands, (board, new_deck), self)
+        return RoundState(1, new_street, [0, 0], self.stacks, new_hands, (board, new_deck, self.deck[2]), self)
 
     def proceed(self, action):
         '''
@@ -159,12 +300,78 @@ class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks'
         return RoundState(self.button + 1, self.street, new_pips, new_stacks, self.hands, self.deck, self)
 
 
+class PlayerLog():
+    '''
+    Streams a pokerbot's output to its player log as it arrives. Only the first PLAYER_LOG_SIZE_LIMIT
+    bytes are kept and the rest are counted, so a chatty pokerbot cannot grow the engine's memory.
+    '''
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = None
+        self.opened = False
+        self.bytes_written = 0
+        self.bytes_dropped = 0
+        self.lock = Lock()
+        if RESUME and os.path.exists(filename):
+            # keep the interrupted run's output, which counts towards the size limit
+            self.opened = True
+            self.bytes_written = os.path.getsize(filename)
+
+    def open(self):
+        '''
+        Opens the file on first use, appending if it was closed before (e.g. across a restart) or on RESUME.
+        '''
+        if self.file is None:
+            self.file = open(self.filename, 'ab' if self.opened else 'wb')
+            self.opened = True
+
+    def write(self, output):
+        '''
+        Appends output up to the size limit. Called from the output thread as well as the engine.
+        '''
+        if not output:
+            return
+        with self.lock:
+            room = max(PLAYER_LOG_SIZE_LIMIT - self.bytes_written, 0)
+            if len(output) > room:
+                self.bytes_dropped += len(output) - room
+                output = output[:room]
+            if output:
+                self.open()
+                self.bytes_written += self.file.write(output)
+
+    def close(self):
+        '''
+        Notes any dropped output and closes the file, creating it if the pokerbot printed nothing.
+        '''
+        with self.lock:
+            self.open()
+            if self.bytes_dropped > 0:
+                self.file.write('\n[{} more bytes dropped, PLAYER_LOG_SIZE_LIMIT reached]\n'.format(
+                    self.bytes_dropped).encode())
+                self.bytes_dropped = 0
+            self.file.close()
+            self.file = None
+
+
+TRANSPORTS = ('tcp', 'unix', 'socketpair')
+
+
+def check_transport():
+    '''
+    Raises a ValueError if the configured TRANSPORT is not one the engine knows.
+    '''
+    if TRANSPORT not in TRANSPORTS:
+        raise ValueError('TRANSPORT must be one of {}, not {!r}'.format(', '.join(map(repr, TRANSPORTS)), TRANSPORT))
+
+
 class Player():
     '''
     Handles subprocess and socket interactions with one player's pokerbot.
     '''
 
-    def __init__(self, name, path):
+    def __init__(self, name, path, log_directory=None):
         self.name = name
         self.path = path
         self.game_clock = STARTING_GAME_CLOCK
@@ -172,7 +379,14 @@ class Player():
         self.commands = None
         self.bot_subprocess = None
         self.socketfile = None
-        self.bytes_queue = Queue()
+        self.wire = None
+        self.tables = 1
+        # player logs sit next to the game log so that concurrent matches do not collide
+        self.log_directory = os.path.dirname(GAME_LOG_FILENAME) if log_directory is None else log_directory
+        self.player_log = PlayerLog(os.path.join(self.log_directory, name + '.txt'))
+        self.output_thread = None
+        self.decision_times = []
+        self.round_time = 0.
 
     def build(self):
         '''
@@ -197,55 +411,155 @@ class Player():
                 proc = subprocess.run(self.commands['build'],
                                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
                                       cwd=self.path, timeout=BUILD_TIMEOUT, check=False)
-                self.bytes_queue.put(proc.stdout)
+                self.player_log.write(proc.stdout)
             except subprocess.TimeoutExpired as timeout_expired:
                 error_message = 'Timed out waiting for ' + self.name + ' to build'
                 print(error_message)
-                self.bytes_queue.put(timeout_expired.stdout)
-                self.bytes_queue.put(error_message.encode())
+                self.player_log.write(timeout_expired.stdout)
+                self.player_log.write(error_message.encode())
             except (TypeError, ValueError):
                 print(self.name, 'build command misformatted')
             except OSError:
                 print(self.name, 'build failed - check "build" in commands.json')
 
-    def run(self):
+    def launch(self, args, pass_fds=()):
         '''
-        Runs the pokerbot and establishes the socket connection.
+        Starts the pokerbot process with the given connection arguments.
+        '''
+        proc = subprocess.Popen(self.commands['run'] + args,
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                cwd=self.path, pass_fds=pass_fds)
+        self.bot_subprocess = proc
+        # function for bot listening, reading whatever is available so a long line is never held whole
+        def stream_output(out, player_log):
+            try:
+                for output in iter(lambda: out.read1(65536), b''):
+                    player_log.write(output)
+            except ValueError:
+                pass
+        # start a separate bot listening thread which dies with the program
+        self.output_thread = Thread(target=stream_output, args=(proc.stdout, self.player_log), daemon=True)
+        self.output_thread.start()
+
+    def run(self, tables=1):
+        '''
+        Runs the pokerbot and establishes the socket connection, offering it that many tables.
         '''
         if self.commands is not None and len(self.commands['run']) > 0:
+            check_transport()
             try:
-                server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                if TRANSPORT == 'socketpair':
+                    # the pokerbot inherits its end of a connected pair, so there is nothing to accept
+                    engine_socket, bot_socket = socket.socketpair()
+                    with engine_socket, bot_socket:
+                        self.launch(['--fd', str(bot_socket.fileno())], pass_fds=(bot_socket.fileno(),))
+                        engine_socket.settimeout(CONNECT_TIMEOUT)
+                        self.socketfile = engine_socket.makefile('rw')
+                    self.negotiate(tables)
+                    print(self.name, 'connected successfully')
+                    return
+                if TRANSPORT == 'unix':
+                    server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                    socket_directory = tempfile.mkdtemp()
+                    address = os.path.join(socket_directory, 'engine.sock')
+                    args = ['--unix', address]
+                else:
+                    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                    socket_directory = None
+                    address = ('', 0)
                 with server_socket:
-                    server_socket.bind(('', 0))
+                    server_socket.bind(address)
                     server_socket.settimeout(CONNECT_TIMEOUT)
                     server_socket.listen()
-                    port = server_socket.getsockname()[1]
-                    proc = subprocess.Popen(self.commands['run'] + [str(port)],
-                                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                                            cwd=self.path)
-                    self.bot_subprocess = proc
-                    # function for bot listening
-                    def enqueue_output(out, queue):
-                        try:
-                            for line in out:
-                                queue.put(line)
-                        except ValueError:
-                            pass
-                    # start a separate bot listening thread which dies with the program
-                    Thread(target=enqueue_output, args=(proc.stdout, self.bytes_queue), daemon=True).start()
-                    # block until we timeout or the player connects
-                    client_socket, _ = server_socket.accept()
+                    if socket_directory is None:
+                        args = [str(server_socket.getsockname()[1])]
+                    self.launch(args)
+                    try:
+                        # block until we timeout or the player connects
+                        client_socket, _ = server_socket.accept()
+                    finally:
+                        if socket_directory is not None:
+                            shutil.rmtree(socket_directory, ignore_errors=True)
                     with client_socket:
                         client_socket.settimeout(CONNECT_TIMEOUT)
                         sock = client_socket.makefile('rw')
                         self.socketfile = sock
+                        self.negotiate(tables)
                         print(self.name, 'connected successfully')
             except (TypeError, ValueError):
                 print(self.name, 'run command misformatted')
-            except OSError:
-                print(self.name, 'run failed - check "run" in commands.json')
             except socket.timeout:
                 print('Timed out waiting for', self.name, 'to connect')
+            except OSError:
+                print(self.name, 'run failed - check "run" in commands.json')
+
+    def negotiate(self, tables=1):
+        '''
+        Offers that many tables and the binary wire protocol, as configured, and records what the pokerbot accepts.
+        '''
+        self.wire = None
+        self.tables = 1
+        if tables > 1:
+            offer = 'M' + str(tables)
+            self.socketfile.write(offer + '\n')
+            self.socketfile.flush()
+            if self.socketfile.readline().strip() == offer:
+                self.tables = tables
+        if WIRE_PROTOCOL == 'binary':
+            self.socketfile.write(WIRE_VERSION + '\n')
+            self.socketfile.flush()
+            if self.socketfile.readline().strip() == WIRE_VERSION:
+                self.wire = self.socketfile.buffer
+
+    def encode_message(self, clauses):
+        '''
+        Encodes a list of clauses in the negotiated protocol.
+        '''
+        if self.wire is None:
+            return ' '.join(clauses) + '\n'
+        return encode_frame(clauses)
+
+    def send_message(self, message):
+        '''
+        Sends an encoded message to the pokerbot.
+        '''
+        stream = self.socketfile if self.wire is None else self.wire
+        stream.write(message)
+        stream.flush()
+
+    def receive_clause(self):
+        '''
+        Reads the pokerbot's response as a text clause.
+        '''
+        if self.wire is None:
+            return self.socketfile.readline().strip()
+        return read_response(self.wire)
+
+    def reset(self, round_num=1, bankroll=0, game_clock=None):
+        '''
+        Starts a new game with an already running pokerbot, keeping its process and connection.
+        A resumed game starts at round_num with the given bankroll and game clock.
+        '''
+        if self.game_clock <= 0. and self.bot_subprocess is not None:
+            # the connection may be out of step after a timeout, so start the pokerbot afresh
+            print('Restarting', self.name)
+            self.stop()
+            self.socketfile = None
+            self.wire = None
+            self.bot_subprocess = None
+            self.run()
+        self.game_clock = STARTING_GAME_CLOCK if game_clock is None else game_clock
+        self.bankroll = bankroll
+        self.decision_times = []
+        self.round_time = 0.
+        if self.socketfile is not None:
+            clause = 'N' if round_num == 1 and bankroll == 0 else 'N{},{}'.format(round_num, bankroll)
+            try:
+                self.send_message(self.encode_message([clause]))
+                self.receive_clause()
+            except OSError:
+                print(self.name, 'disconnected')
+                self.game_clock = 0.
 
     def stop(self):
         '''
@@ -253,7 +567,7 @@ class Player():
         '''
         if self.socketfile is not None:
             try:
-                self.socketfile.write('Q\n')
+                self.send_message(self.encode_message(['Q']))
                 self.socketfile.close()
             except socket.timeout:
                 print('Timed out waiting for', self.name, 'to disconnect')
@@ -261,22 +575,73 @@ class Player():
                 print('Could not close socket connection with', self.name)
         if self.bot_subprocess is not None:
             try:
-                outs, _ = self.bot_subprocess.communicate(timeout=CONNECT_TIMEOUT)
-                self.bytes_queue.put(outs)
+                self.bot_subprocess.wait(timeout=CONNECT_TIMEOUT)
             except subprocess.TimeoutExpired:
                 print('Timed out waiting for', self.name, 'to quit')
                 self.bot_subprocess.kill()
-                outs, _ = self.bot_subprocess.communicate()
-                self.bytes_queue.put(outs)
-        with open(self.name + '.txt', 'wb') as log_file:
-            bytes_written = 0
-            for output in self.bytes_queue.queue:
-                try:
-                    bytes_written += log_file.write(output)
-                    if bytes_written >= PLAYER_LOG_SIZE_LIMIT:
-                        break
-                except TypeError:
-                    pass
+                self.bot_subprocess.wait()
+            # the pipe stays open while a process the pokerbot started is still running
+            self.output_thread.join(CONNECT_TIMEOUT)
+            if not self.output_thread.is_alive():
+                self.bot_subprocess.stdout.close()
+        self.player_log.close()
+
+    def record_decision(self, round_state, legal_actions, seconds):
+        '''
+        Keeps the time one query took, keyed by street and legal action set.
+        '''
+        if isinstance(round_state, TerminalState):
+            street = 'Ack'
+        else:
+            street = 'Preflop' if round_state.street == 0 else STREET_NAMES[round_state.street - 3]
+        legal = ''.join(sorted(ACTION_CODES[action] for action in legal_actions))
+        self.decision_times.append((street, legal, seconds))
+        self.round_time += seconds
+
+    def prepare_message(self, player_message):
+        '''
+        Stamps the game clock on a player message, encodes it and clears the sent action history.
+        '''
+        player_message[0] = 'T{:.3f}'.format(self.game_clock)
+        message = self.encode_message(player_message)
+        del player_message[1:]  # do not send redundant action history
+        return message
+
+    def charge(self, round_state, legal_actions, seconds):
+        '''
+        Charges a response time to the game clock, raising socket.timeout once it runs out.
+        '''
+        if ENFORCE_GAME_CLOCK:
+            self.game_clock -= seconds
+        if LATENCY_REPORT:
+            self.record_decision(round_state, legal_actions, seconds)
+        if self.game_clock <= 0.:
+            raise socket.timeout
+
+    def decode_action(self, round_state, legal_actions, clause, game_log):
+        '''
+        Decodes a response clause, returning None if the action is illegal.
+        '''
+        action = DECODE[clause[0]]
+        if action in legal_actions:
+            if clause[0] == 'R':
+                amount = int(clause[1:])
+                min_raise, max_raise = round_state.raise_bounds()
+                if min_raise <= amount <= max_raise:
+                    return action(amount)
+            else:
+                return action()
+        game_log.append(self.name + ' attempted illegal ' + action.__name__)
+        return None
+
+    def disconnect(self, game_log, reason):
+        '''
+        Logs why the pokerbot stopped responding and forfeits its remaining time.
+        '''
+        error_message = self.name + reason
+        game_log.append(error_message)
+        print(error_message)
+        self.game_clock = 0.
 
     def query(self, round_state, player_message, game_log):
         '''
@@ -287,51 +652,554 @@ class Player():
         if self.socketfile is not None and self.game_clock > 0.:
             clause = ''
             try:
-                player_message[0] = 'T{:.3f}'.format(self.game_clock)
-                message = ' '.join(player_message) + '\n'
-                del player_message[1:]  # do not send redundant action history
+                message = self.prepare_message(player_message)
                 start_time = time.perf_counter()
-                self.socketfile.write(message)
-                self.socketfile.flush()
-                clause = self.socketfile.readline().strip()
+                self.send_message(message)
+                clause = self.receive_clause()
                 end_time = time.perf_counter()
-                if ENFORCE_GAME_CLOCK:
-                    self.game_clock -= end_time - start_time
-                if self.game_clock <= 0.:
-                    raise socket.timeout
-                action = DECODE[clause[0]]
-                if action in legal_actions:
-                    if clause[0] == 'R':
-                        amount = int(clause[1:])
-                        min_raise, max_raise = round_state.raise_bounds()
-                        if min_raise <= amount <= max_raise:
-                            return action(amount)
-                    else:
-                        return action()
-                game_log.append(self.name + ' attempted illegal ' + action.__name__)
+                self.charge(round_state, legal_actions, end_time - start_time)
+                action = self.decode_action(round_state, legal_actions, clause, game_log)
+                if action is not None:
+                    return action
             except socket.timeout:
-                error_message = self.name + ' ran out of time'
-                game_log.append(error_message)
-                print(error_message)
-                self.game_clock = 0.
+                self.disconnect(game_log, ' ran out of time')
             except OSError:
-                error_message = self.name + ' disconnected'
-                game_log.append(error_message)
-                print(error_message)
-                self.game_clock = 0.
+                self.disconnect(game_log, ' disconnected')
             except (IndexError, KeyError, ValueError):
                 game_log.append(self.name + ' response misformatted: ' + str(clause))
         return CheckAction() if CheckAction in legal_actions else FoldAction()
 
+    def table_seat(self):
+        '''
+        Returns a Player with its own game clock and bankroll for one table, sharing this connection.
+        '''
+        seat = Player(self.name, self.path, self.log_directory)
+        seat.bot_subprocess = self.bot_subprocess  # for the resource report, the process is shared by every table
+        if self.tables > 1:
+            seat.socketfile = self.socketfile
+        return seat
+
+    def query_tables(self, queries, game_logs):
+        '''
+        Requests actions for several tables in one message, with each table's clauses tagged I<table>.
+        queries maps table numbers to (seat, round_state, player_message) and the response time
+        of the whole message is charged to every seat in it. Returns the actions by table.
+        '''
+        legal_actions = {}
+        clauses = []
+        for table, (seat, round_state, player_message) in queries.items():
+            legal_actions[table] = round_state.legal_actions() if isinstance(round_state, RoundState) else {CheckAction}
+            if seat.socketfile is not None and seat.game_clock > 0.:
+                if self.game_clock <= 0.:  # the connection broke on another table
+                    seat.disconnect(game_logs[table], ' disconnected')
+                    continue
+                player_message[0] = 'T{:.3f}'.format(seat.game_clock)
+                clauses.append('I' + str(table))
+                clauses.extend(player_message)
+                del player_message[1:]  # do not send redundant action history
+        responses = {}
+        if clauses:
+            try:
+                message = self.encode_message(clauses)
+                start_time = time.perf_counter()
+                self.send_message(message)
+                response = self.receive_clause()
+                seconds = time.perf_counter() - start_time
+                table = None
+                for clause in response.split(' '):
+                    if clause[:1] == 'I':
+                        table = int(clause[1:])
+                    elif table is not None:
+                        responses[table] = clause
+            except socket.timeout:
+                self.game_clock = 0.
+                reason = ' ran out of time'
+            except (OSError, ValueError):
+                self.game_clock = 0.
+                reason = ' disconnected'
+        actions = {}
+        for table, (seat, round_state, player_message) in queries.items():
+            actions[table] = CheckAction() if CheckAction in legal_actions[table] else FoldAction()
+            if seat.socketfile is None or seat.game_clock <= 0.:
+                continue
+            if self.game_clock <= 0.:
+                seat.disconnect(game_logs[table], reason)
+                continue
+            clause = responses.get(table, '')
+            try:
+                seat.charge(round_state, legal_actions[table], seconds)
+                action = seat.decode_action(round_state, legal_actions[table], clause, game_logs[table])
+                if action is not None:
+                    actions[table] = action
+            except socket.timeout:
+                seat.disconnect(game_logs[table], ' ran out of time')
+            except (IndexError, KeyError, ValueError):
+                game_logs[table].append(seat.name + ' response misformatted: ' + str(clause))
+        return actions
+
+
+class LocalSocketFile():
+    '''
+    Stands in for a player's socket file by handing each message straight to its skeleton Runner.
+    '''
+
+    def __init__(self, runner, player_log):
+        self.runner = runner
+        self.player_log = player_log
+        self.message = ''
+        self.response = ''
+
+    def write(self, message):
+        self.message += message
+
+    def flush(self):
+        '''
+        Lets the pokerbot handle the pending message and stores its encoded response.
+        '''
+        packet = self.message.strip().split(' ')
+        self.message = ''
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                if packet[0][0] == 'I':
+                    clauses = self.runner.encode_tables(self.runner.handle_tables(packet))
+                else:
+                    action = self.runner.handle(packet)
+                    clauses = [] if action is None else [self.runner.encode(action)]
+        except Exception:
+            self.player_log.write((output.getvalue() + traceback.format_exc()).encode())
+            raise OSError('pokerbot raised an exception')
+        if output.tell() > 0:
+            self.player_log.write(output.getvalue().encode())
+        self.response = ' '.join(clauses) + '\n' if clauses else ''
+
+    def readline(self):
+        response, self.response = self.response, ''
+        return response
+
+    def close(self):
+        if self.message:
+            self.flush()
+
+
+class LocalPlayer(Player):
+    '''
+    Plays one pokerbot inside the engine's process, without a subprocess or socket.
+    '''
+
+    def build(self):
+        '''
+        Imports the pokerbot's Player class instead of building it.
+        '''
+        try:
+            pokerbot, runner_class = load_bot(self.path)
+            self.socketfile = LocalSocketFile(runner_class(pokerbot, None), self.player_log)
+        except Exception:
+            print(self.name, 'failed to load - check player.py')
+            self.player_log.write(traceback.format_exc().encode())
+
+    def run(self, tables=1):
+        '''
+        Nothing to launch, the pokerbot is already loaded. It plays that many tables if it accepts them.
+        '''
+        if self.socketfile is not None:
+            self.tables = tables if self.socketfile.runner.accepts_tables(tables) else 1
+            print(self.name, 'loaded in-process')
+
+
+class GameLog():
+    '''
+    Streams the game log to disk, flushing once per round so memory stays flat.
+    '''
+
+    def __init__(self, filename, compress=False):
+        self.filename = filename + ('.txt.gz' if compress else '.txt')
+        self.compress = compress
+        self.file = None
+        self.lines = []
+        self.written = False
+
+    def append(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        '''
+        Writes out the buffered lines. The output is byte-for-byte what joining
+        every line with newlines would give, without a trailing newline.
+        '''
+        if self.file is None:
+            self.file = gzip.open(self.filename, 'wt') if self.compress else open(self.filename, 'w')
+        if self.lines:
+            self.file.write(('\n' if self.written else '') + '\n'.join(self.lines))
+            self.written = True
+            self.lines.clear()
+        self.file.flush()
+
+    def tell(self):
+        '''
+        Returns the length of the log written so far, for a checkpoint.
+        '''
+        self.flush()
+        return self.file.tell()
+
+    def resume(self, offset):
+        '''
+        Continues the log of an interrupted game, dropping whatever was written after offset.
+        '''
+        if self.compress:
+            # gzip streams cannot be truncated, so keep the first offset bytes in a fresh file
+            with gzip.open(self.filename, 'rb') as old_file:
+                kept = old_file.read(offset)
+            with gzip.open(self.filename, 'wb') as new_file:
+                new_file.write(kept)
+            self.file = gzip.open(self.filename, 'at')
+        else:
+            with open(self.filename, 'r+b') as old_file:
+                old_file.truncate(offset)
+            self.file = open(self.filename, 'a')
+        self.written = offset > 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class BinaryGameLog():
+    '''
+    Writes the compact binary game log next to the text log, one record per round.
+    '''
+
+    def __init__(self, filename, names, resume_rounds=None):
+        self.filename = filename + '.bin'
+        if resume_rounds is None:
+            self.file = open(self.filename, 'wb')
+            self.file.write(BINARY_LOG_HEADER.pack(b'PBGL', 1, BINARY_LOG_RECORD.size,
+                                                   names[0].encode(), names[1].encode()))
+            self.round_num = 0
+        else:  # continue an interrupted game's log after its last checkpointed round
+            self.file = open(self.filename, 'r+b')
+            self.file.truncate(BINARY_LOG_HEADER.size + resume_rounds * BINARY_LOG_RECORD.size)
+            self.file.seek(0, os.SEEK_END)
+            self.round_num = resume_rounds
+        self.hands = []
+        self.actions = []
+
+    def observe(self, round_state, action):
+        '''
+        Records an action and, on the first action of a street, both hands.
+        '''
+        if len(self.hands) < 3 and round_state.street == (0, 3, 4)[len(self.hands)]:
+            self.hands.append([CARD_CODE(card) for hand in round_state.hands for card in hand])
+        code = BINARY_ACTION_CODES[type(action)] << 14
+        self.actions.append((code | action.amount) if isinstance(action, RaiseAction) else code)
+
+    def write_round(self, first_seat, terminal_state):
+        '''
+        Packs the observed round into one record.
+        '''
+        self.round_num += 1
+        previous_state = terminal_state.previous_state
+        swaps = 0
+        for street in range(len(self.hands) - 1):
+            for i in range(4):
+                if self.hands[street][i] != self.hands[street + 1][i]:
+                    swaps |= 1 << (4 * street + i)
+        hands = [code for street_hands in self.hands for code in street_hands]
+        hands += [-1] * (12 - len(hands))
+        board = [CARD_CODE(card) for card in previous_state.deck[0]]
+        board += [-1] * (5 - len(board))
+        actions = self.actions[:BINARY_LOG_MAX_ACTIONS]
+        flags = int(len(self.actions) > BINARY_LOG_MAX_ACTIONS)
+        actions += [0] * (BINARY_LOG_MAX_ACTIONS - len(actions))
+        self.file.write(BINARY_LOG_RECORD.pack(self.round_num, first_seat, previous_state.street,
+                                               min(len(self.actions), BINARY_LOG_MAX_ACTIONS), flags, swaps,
+                                               *hands, *board, *terminal_state.deltas, *actions))
+        self.hands = []
+        self.actions = []
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def summarize_times(times):
+    '''
+    Returns the count, mean, percentiles and maximum of a list of timings in seconds.
+    '''
+    if not times:
+        return {'count': 0}
+    times = sorted(times)
+    percentile = lambda q: times[min(len(times) - 1, int(q * len(times)))]
+    return {'count': len(times), 'mean': sum(times) / len(times), 'p50': percentile(0.5),
+            'p95': percentile(0.95), 'p99': percentile(0.99), 'max': times[-1]}
+
+
+class LatencyReport():
+    '''
+    Collects per-round engine overhead and decision times for the latency report.
+    '''
+
+    def __init__(self):
+        self.engine_times = {'log': [], 'transition': []}
+        self.rounds = []
+
+    def record_round(self, players, log_time, transition_time):
+        '''
+        Adds one round of engine overhead and each player's total decision time.
+        '''
+        self.engine_times['log'].append(log_time)
+        self.engine_times['transition'].append(transition_time)
+        entry = {'round': len(self.rounds) + 1, 'log': log_time, 'transition': transition_time}
+        for player in players:
+            entry[player.name] = player.round_time
+            player.round_time = 0.
+        self.rounds.append(entry)
+
+    def write(self, filename, players):
+        '''
+        Writes the report as JSON: decision time histograms by player, street and legal
+        action set, engine overhead per round, and the per-round time series.
+        '''
+        report = {'players': {}, 'engine': {}, 'rounds': self.rounds}
+        for player in players:
+            by_street = {}
+            for street, legal, seconds in player.decision_times:
+                by_street.setdefault(street, {}).setdefault(legal, []).append(seconds)
+            report['players'][player.name] = {
+                'all': summarize_times([seconds for _, _, seconds in player.decision_times]),
+                'streets': {street: {legal: summarize_times(times) for legal, times in by_legal.items()}
+                            for street, by_legal in by_street.items()},
+            }
+        for name, times in self.engine_times.items():
+            report['engine'][name] = summarize_times(times)
+        with open(filename, 'w') as report_file:
+            json.dump(report, report_file, indent=1)
+
+
+# /proc/<pid>/stat counts CPU time in clock ticks, typically 10 ms
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def read_process_usage(pid):
+    '''
+    Reads the CPU seconds, resident memory in kB and thread count of a process and its descendants from /proc.
+    peak_rss_sum_kb adds up each process's own peak, which bounds the peak of rss_kb from above.
+    Returns None where /proc is unavailable or the process has exited.
+    '''
+    usage = {'user': 0., 'system': 0., 'rss_kb': 0, 'peak_rss_sum_kb': 0, 'threads': 0}
+    pids = [pid]
+    while pids:
+        process = pids.pop()
+        try:
+            with open('/proc/{}/stat'.format(process)) as stat_file:
+                fields = stat_file.read().rpartition(')')[2].split()
+            with open('/proc/{}/status'.format(process)) as status_file:
+                status = dict(line.split(':', 1) for line in status_file if ':' in line)
+        except (OSError, ValueError):
+            if process == pid:
+                return None
+            continue  # a descendant exited while we were reading it
+        children = []
+        try:
+            for task in os.listdir('/proc/{}/task'.format(process)):
+                with open('/proc/{}/task/{}/children'.format(process, task)) as children_file:
+                    children.extend(int(child) for child in children_file.read().split())
+        except (OSError, ValueError):
+            pass  # without task children files (CONFIG_PROC_CHILDREN) the process is counted on its own
+        # utime, stime, then the same for waited-for children
+        usage['user'] += (int(fields[11]) + int(fields[13])) / CLOCK_TICKS
+        usage['system'] += (int(fields[12]) + int(fields[14])) / CLOCK_TICKS
+        usage['rss_kb'] += int(status.get('VmRSS', '0').split()[0])
+        usage['peak_rss_sum_kb'] += int(status.get('VmHWM', '0').split()[0])
+        usage['threads'] += int(status.get('Threads', '0'))
+        pids.extend(children)
+    usage['user'] = round(usage['user'], 3)
+    usage['system'] = round(usage['system'], 3)
+    return usage
+
+
+class ResourceReport():
+    '''
+    Samples each pokerbot process from /proc after every round for the resource report.
+    '''
+
+    def __init__(self):
+        self.start_usage = {}
+        self.previous_cpu = {}
+        self.rounds = []
+
+    @staticmethod
+    def sample(player):
+        '''
+        Returns the usage of the player's pokerbot process, or None if it is not running.
+        '''
+        if player.bot_subprocess is None:
+            return None
+        return read_process_usage(player.bot_subprocess.pid)
+
+    def start(self, players):
+        '''
+        Takes the baseline before the first round, which includes the pokerbots' start up.
+        '''
+        for player in players:
+            usage = self.sample(player)
+            self.start_usage[player.name] = usage
+            self.previous_cpu[player.name] = 0. if usage is None else usage['user'] + usage['system']
+
+    def record_round(self, players):
+        '''
+        Adds one round of CPU time, memory and thread count for each player.
+        '''
+        entry = {'round': len(self.rounds) + 1}
+        for player in players:
+            usage = self.sample(player)
+            if usage is not None:
+                cpu = usage['user'] + usage['system']
+                usage['cpu'] = round(cpu - self.previous_cpu[player.name], 3)
+                self.previous_cpu[player.name] = cpu
+            entry[player.name] = usage
+        self.rounds.append(entry)
+
+    def write(self, filename, players):
+        '''
+        Writes the report as JSON: each player's start up and in-game CPU seconds, peak memory,
+        most threads and per-round CPU histogram, and the per-round samples. peak_rss_kb is the most
+        memory the pokerbot's processes held together at a sample and peak_rss_sum_kb the sum of their own peaks.
+        CPU times have the resolution of a clock tick.
+        '''
+        report = {'players': {}, 'rounds': self.rounds}
+        for player in players:
+            samples = [entry[player.name] for entry in self.rounds if entry[player.name] is not None]
+            start_usage = self.start_usage.get(player.name)
+            if not samples or start_usage is None:
+                report['players'][player.name] = None
+                continue
+            last = samples[-1]
+            report['players'][player.name] = {
+                'startup_cpu_seconds': round(start_usage['user'] + start_usage['system'], 3),
+                'cpu_seconds': round(last['user'] + last['system'] - start_usage['user'] - start_usage['system'], 3),
+                'user_seconds': round(last['user'] - start_usage['user'], 3),
+                'system_seconds': round(last['system'] - start_usage['system'], 3),
+                'peak_rss_kb': max(sample['rss_kb'] for sample in samples),
+                'peak_rss_sum_kb': max(sample['peak_rss_sum_kb'] for sample in samples),
+                'max_threads': max(sample['threads'] for sample in samples),
+                'cpu_per_round': summarize_times([sample['cpu'] for sample in samples]),
+            }
+        with open(filename, 'w') as report_file:
+            json.dump(report, report_file, indent=1)
+
+
+class SequentialTest():
+    '''
+    Sequential probability ratio test on one player's bankroll deltas: a normal mean of +delta
+    against -delta, with the variance estimated from the deltas so far.
+    '''
+
+    def __init__(self, delta, alpha, beta):
+        self.delta = delta
+        self.upper = math.log((1 - beta) / alpha)
+        self.lower = math.log(beta / (1 - alpha))
+        self.count = 0
+        self.total = 0.
+        self.total_squares = 0.
+
+    def add(self, delta):
+        self.count += 1
+        self.total += delta
+        self.total_squares += delta * delta
+
+    def decide(self):
+        '''
+        Returns 1 if the player is winning, -1 if losing and 0 if undecided, with the log-likelihood ratio.
+        '''
+        if self.count < 2:
+            return 0, 0.
+        variance = (self.total_squares - self.total * self.total / self.count) / (self.count - 1)
+        if variance <= 0.:
+            return 0, 0.
+        log_likelihood_ratio = 2 * self.delta * self.total / variance
+        if log_likelihood_ratio >= self.upper:
+            return 1, log_likelihood_ratio
+        if log_likelihood_ratio <= self.lower:
+            return -1, log_likelihood_ratio
+        return 0, log_likelihood_ratio
+
 
 class Game():
     '''
     Manages logging and the high-level game procedure.
     '''
 
-    def __init__(self):
-        self.log = ['6.176 MIT Pokerbots - ' + PLAYER_1_NAME + ' vs ' + PLAYER_2_NAME]
+    def __init__(self, log_filename=None, player_names=None, seed=None):
+        self.log_filename = GAME_LOG_FILENAME if log_filename is None else log_filename
+        self.player_names = [PLAYER_1_NAME, PLAYER_2_NAME] if player_names is None else list(player_names)
+        self.checkpoint_filename = self.log_filename + '.ckpt'
+        self.checkpoint = self.load_checkpoint() if RESUME else None
+        if self.checkpoint is not None:
+            seed = self.checkpoint['seed']
+        elif seed is None:
+            seed = SEED if SEED is not None else random.SystemRandom().randrange(1 << 32)
+        self.seed = seed
+        # independent streams keep the deal and each street's swaps reproducible on their own
+        self.deal_rng, self.flop_rng, self.turn_rng = [random.Random('{} {}'.format(self.seed, stream))
+                                                       for stream in ('deal', 'flop', 'turn')]
+        self.log = GameLog(self.log_filename, COMPRESS_GAME_LOG)
+        if self.checkpoint is None:
+            self.log.append('6.176 MIT Pokerbots - ' + self.player_names[0] + ' vs ' + self.player_names[1])
+            self.log.append('Seed ' + str(self.seed))
+        else:
+            self.log.resume(self.checkpoint['log_offset'])
+        self.latency_report = LatencyReport() if LATENCY_REPORT else None
+        self.resource_report = ResourceReport() if RESOURCE_REPORT else None
+        self.binary_log = None
+        if BINARY_GAME_LOG:
+            resume_rounds = None if self.checkpoint is None else self.checkpoint['round']
+            self.binary_log = BinaryGameLog(self.log_filename, self.player_names, resume_rounds)
         self.player_messages = [[], []]
+        # duplicate pairs cover two rounds, so they are tested against twice the per-round effect
+        step = 2 if DUPLICATE_DEALS else 1
+        self.sequential_test = SequentialTest(step * EARLY_STOP_DELTA, EARLY_STOP_ALPHA, EARLY_STOP_BETA) if EARLY_STOP else None
+        if self.checkpoint is not None:
+            for rng, state in zip((self.deal_rng, self.flop_rng, self.turn_rng), self.checkpoint['rng_states']):
+                rng.setstate((state[0], tuple(state[1]), state[2]))
+            if self.sequential_test is not None and self.checkpoint['sequential_test'] is not None:
+                self.sequential_test.count, self.sequential_test.total, self.sequential_test.total_squares = \
+                    self.checkpoint['sequential_test']
+
+    def load_checkpoint(self):
+        '''
+        Reads the checkpoint of an interrupted game, or returns None if there is none.
+        '''
+        try:
+            with open(self.checkpoint_filename) as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+        except FileNotFoundError:
+            print('No checkpoint at', self.checkpoint_filename, '- starting from round 1')
+            return None
+        print('Resuming', self.log_filename, 'after round', checkpoint['round'])
+        return checkpoint
+
+    def save_checkpoint(self, round_num, players, pair_deltas):
+        '''
+        Saves everything needed to continue the game after round_num, replacing the previous checkpoint.
+        '''
+        test = self.sequential_test
+        checkpoint = {
+            'round': round_num,
+            'seed': self.seed,
+            'bankrolls': {player.name: player.bankroll for player in players},
+            'game_clocks': {player.name: player.game_clock for player in players},
+            'rng_states': [rng.getstate() for rng in (self.deal_rng, self.flop_rng, self.turn_rng)],
+            'log_offset': self.log.tell(),
+            'pair_deltas': pair_deltas,
+            'sequential_test': None if test is None else [test.count, test.total, test.total_squares],
+        }
+        # write then rename, so a crash mid-write leaves the previous checkpoint intact
+        with open(self.checkpoint_filename + '.tmp', 'w') as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file)
+        os.replace(self.checkpoint_filename + '.tmp', self.checkpoint_filename)
 
     def log_round_state(self, players, round_state):
         '''
@@ -393,61 +1261,261 @@ class Game():
         self.player_messages[0].append('D' + str(round_state.deltas[0]))
         self.player_messages[1].append('D' + str(round_state.deltas[1]))
 
-    def run_round(self, players):
+    def log_duplicate_deals(self, name, pair_deltas):
+        '''
+        Reports the paired bankroll difference over all duplicate deals.
+        '''
+        mean = statistics.mean(pair_deltas)
+        standard_error = statistics.stdev(pair_deltas) / len(pair_deltas) ** 0.5
+        message = 'Duplicate deals, {} pairs: {} paired delta {} (mean {:.2f}, standard error {:.2f})'.format(
+            len(pair_deltas), name, sum(pair_deltas), mean, standard_error)
+        self.log.append(message)
+        print(message)
+
+    def check_early_stop(self, first_player, second_player, round_num, delta):
         '''
-        Runs one round of poker.
+        Adds the latest delta of the first player to the sequential test.
+        Returns the reason to stop the match now, or None to play on.
         '''
-        deck = eval7.Deck()
-        deck.shuffle()
-        deck = ([], deck)
+        self.sequential_test.add(delta)
+        remaining = NUM_ROUNDS - round_num
+        leader, trailer = (first_player, second_player) if first_player.bankroll > 0 else (second_player, first_player)
+        # no player can lose more than STARTING_STACK in a round
+        if leader.bankroll > remaining * STARTING_STACK:
+            return '{} leads by {} with {} rounds left'.format(leader.name, leader.bankroll - trailer.bankroll, remaining)
+        if round_num < EARLY_STOP_MIN_ROUNDS:
+            return None
+        decision, log_likelihood_ratio = self.sequential_test.decide()
+        if decision == 0:
+            return None
+        winner = first_player if decision == 1 else second_player
+        return 'sequential test favours {} (log-likelihood ratio {:.2f})'.format(winner.name, log_likelihood_ratio)
+
+    def deal(self):
+        '''
+        Shuffles the cards and rolls the flop and turn swaps for one round.
+        '''
+        cards = list(FULL_DECK)
+        self.deal_rng.shuffle(cards)
+        swap_rolls = ([self.flop_rng.random() for _ in range(4)], [self.turn_rng.random() for _ in range(4)])
+        return cards, swap_rolls
+
+    def play_round(self, players, deal):
+        '''
+        Generator for one round of poker with the given deal.
+        Yields (player, round_state, player_message) for every query and expects the player's action back.
+        '''
+        cards, swap_rolls = deal
+        deck = ([], CardDeck(list(cards)), swap_rolls)
         hands = [deck[1].deal(2), deck[1].deal(2)]
         pips = [SMALL_BLIND, BIG_BLIND]
         stacks = [STARTING_STACK - SMALL_BLIND, STARTING_STACK - BIG_BLIND]
         round_state = RoundState(0, 0, pips, stacks, hands, deck, None)
+        log_time = transition_time = 0.
         while not isinstance(round_state, TerminalState):
+            start_time = time.perf_counter()
             self.log_round_state(players, round_state)
+            log_time += time.perf_counter() - start_time
             active = round_state.button % 2
             player = players[active]
-            action = player.query(round_state, self.player_messages[active], self.log)
+            action = yield player, round_state, self.player_messages[active]
             bet_override = (round_state.pips == [0, 0])
+            start_time = time.perf_counter()
             self.log_action(player.name, action, bet_override)
+            if self.binary_log is not None:
+                self.binary_log.observe(round_state, action)
+            log_time += time.perf_counter() - start_time
+            start_time = time.perf_counter()
             round_state = round_state.proceed(action)
+            transition_time += time.perf_counter() - start_time
+        start_time = time.perf_counter()
         self.log_terminal_state(players, round_state)
+        log_time += time.perf_counter() - start_time
+        if self.binary_log is not None:
+            self.binary_log.write_round(int(players[0].name != self.player_names[0]), round_state)
         for player, player_message, delta in zip(players, self.player_messages, round_state.deltas):
-            player.query(round_state, player_message, self.log)
+            yield player, round_state, player_message
             player.bankroll += delta
+        if self.latency_report is not None:
+            self.latency_report.record_round(players, log_time, transition_time)
 
-    def run(self):
+    def play(self, players):
         '''
-        Runs one game of poker.
+        Generator for one game of poker between connected players, yielding their queries as play_round does.
+        Returns the final bankrolls by player name.
         '''
-        print('   __  _____________  ___       __           __        __    ')
-        print('  /  |/  /  _/_  __/ / _ \\___  / /_____ ____/ /  ___  / /____')
-        print(' / /|_/ // /  / /   / ___/ _ \\/  \'_/ -_) __/ _ \\/ _ \\/ __(_-<')
-        print('/_/  /_/___/ /_/   /_/   \\___/_/\\_\\\\__/_/ /_.__/\\___/\\__/___/')
-        print()
-        print('Starting the Pokerbots engine...')
-        players = [
-            Player(PLAYER_1_NAME, PLAYER_1_PATH),
-            Player(PLAYER_2_NAME, PLAYER_2_PATH)
-        ]
-        for player in players:
-            player.build()
-            player.run()
-        for round_num in range(1, NUM_ROUNDS + 1):
+        first_player, second_player = players
+        pair_deltas = []
+        start_round = 1
+        if self.checkpoint is not None:
+            start_round = self.checkpoint['round'] + 1
+            pair_deltas = self.checkpoint['pair_deltas']
+            for player in players:
+                player.bankroll = self.checkpoint['bankrolls'][player.name]
+                player.game_clock = self.checkpoint['game_clocks'][player.name]
+            if self.checkpoint['round'] % 2 == 1:  # the seats swap every round
+                players = players[::-1]
+        if self.resource_report is not None:
+            self.resource_report.start(players)
+        for round_num in range(start_round, NUM_ROUNDS + 1):
+            # in duplicate mode the seats swap every round, so each deal is replayed with them reversed
+            if not DUPLICATE_DEALS or round_num % 2 == 1:
+                deal = self.deal()
+                pair_start = first_player.bankroll
+            round_start = first_player.bankroll
             self.log.append('')
             self.log.append('Round #' + str(round_num) + STATUS(players))
-            self.run_round(players)
+            yield from self.play_round(players, deal)
+            if self.resource_report is not None:
+                self.resource_report.record_round(players)
+            self.log.flush()
+            if self.binary_log is not None:
+                self.binary_log.flush()
             players = players[::-1]
+            if DUPLICATE_DEALS and round_num % 2 == 0:
+                pair_deltas.append(first_player.bankroll - pair_start)
+            # in duplicate mode only whole pairs are tested, so both seatings of a deal always count
+            if self.sequential_test is not None and round_num < NUM_ROUNDS and (not DUPLICATE_DEALS or round_num % 2 == 0):
+                delta = pair_deltas[-1] if DUPLICATE_DEALS else first_player.bankroll - round_start
+                reason = self.check_early_stop(first_player, second_player, round_num, delta)
+                if reason is not None:
+                    message = 'Stopped early after {} rounds: {}'.format(round_num, reason)
+                    self.log.append('')
+                    self.log.append(message)
+                    print(message)
+                    break
+            if (CHECKPOINT_INTERVAL > 0 and round_num % CHECKPOINT_INTERVAL == 0 and round_num < NUM_ROUNDS and
+                    (not DUPLICATE_DEALS or round_num % 2 == 0)):
+                self.save_checkpoint(round_num, players, pair_deltas)
         self.log.append('')
         self.log.append('Final' + STATUS(players))
+        if DUPLICATE_DEALS and len(pair_deltas) > 1:
+            self.log_duplicate_deals(first_player.name, pair_deltas)
+        self.log.close()
+        if self.binary_log is not None:
+            self.binary_log.close()
+        if self.latency_report is not None:
+            self.latency_report.write(self.log_filename + '_latency.json', players)
+        if self.resource_report is not None:
+            self.resource_report.write(self.log_filename + '_resources.json', players)
+        if os.path.exists(self.checkpoint_filename):
+            os.remove(self.checkpoint_filename)
+        return {player.name: player.bankroll for player in players}
+
+    def run(self, players=None):
+        '''
+        Runs one game of poker and returns the final bankrolls by player name.
+        Running players may be passed in to keep them alive across games.
+        '''
+        own_players = players is None
+        if own_players:
+            players = start_players()
+        if self.checkpoint is not None:
+            # the pokerbots are new, so tell them where the game stands
+            for player in players:
+                player.reset(self.checkpoint['round'] + 1, self.checkpoint['bankrolls'][player.name],
+                             self.checkpoint['game_clocks'][player.name])
+        elif not own_players:
+            for player in players:
+                player.reset()
+        print('Writing', self.log.filename)
+        game = self.play(players)
+        action = None
+        try:
+            while True:
+                player, round_state, player_message = game.send(action)
+                action = player.query(round_state, player_message, self.log)
+        except StopIteration as stop:
+            bankrolls = stop.value
+        if own_players:
+            for player in players:
+                player.stop()
+        return bankrolls
+
+
+def start_players(tables=1):
+    '''
+    Builds and connects both pokerbots, offering them that many tables.
+    '''
+    print('   __  _____________  ___       __           __        __    ')
+    print('  /  |/  /  _/_  __/ / _ \\___  / /_____ ____/ /  ___  / /____')
+    print(' / /|_/ // /  / /   / ___/ _ \\/  \'_/ -_) __/ _ \\/ _ \\/ __(_-<')
+    print('/_/  /_/___/ /_/   /_/   \\___/_/\\_\\\\__/_/ /_.__/\\___/\\__/___/')
+    print()
+    print('Starting the Pokerbots engine...')
+    player_class = LocalPlayer if IN_PROCESS else Player
+    players = [
+        player_class(PLAYER_1_NAME, PLAYER_1_PATH),
+        player_class(PLAYER_2_NAME, PLAYER_2_PATH)
+    ]
+    for player in players:
+        player.build()
+        player.run(tables)
+    return players
+
+
+def run_batch(num_games):
+    '''
+    Runs num_games games in a row against the same pokerbot processes, so that building,
+    starting and connecting them is paid once. Returns each game's final bankrolls.
+    '''
+    players = start_players()
+    results = []
+    for game_num in range(1, num_games + 1):
+        results.append(Game(GAME_LOG_FILENAME + '_' + str(game_num)).run(players))
+    for player in players:
+        player.stop()
+    return results
+
+
+def run_tables(num_tables):
+    '''
+    Plays num_tables games at once against the same pokerbot processes, sending each pokerbot
+    its decisions on every table in one message. Returns each table's final bankrolls.
+    If either pokerbot declines the tables, they are played one after another as run_batch does.
+    '''
+    players = start_players(num_tables)
+    # with a fixed SEED, table 1 deals the same cards as a single game would
+    seeds = [None if SEED is None else SEED + table for table in range(num_tables)]
+    declined = [player.name for player in players if player.tables != num_tables]
+    if declined:
+        # a seat without the connection could only check or fold, so play the tables one after another instead
+        for name in declined:
+            print(name, 'does not support multiple tables')
+        print('Playing the tables one after another')
+        results = [Game(GAME_LOG_FILENAME + '_table_' + str(table + 1), seed=seeds[table]).run(players)
+                   for table in range(num_tables)]
         for player in players:
             player.stop()
-        name = GAME_LOG_FILENAME + '.txt'
-        print('Writing', name)
-        with open(name, 'w') as log_file:
-            log_file.write('\n'.join(self.log))
+        return results
+    seats = [[player.table_seat() for _ in range(num_tables)] for player in players]
+    games = [Game(GAME_LOG_FILENAME + '_table_' + str(table + 1), seed=seeds[table]) for table in range(num_tables)]
+    plays = [game.play([seats[0][table], seats[1][table]]) for table, game in enumerate(games)]
+    for game in games:
+        print('Writing', game.log.filename)
+    pending = {table: play.send(None) for table, play in enumerate(plays)}
+    results = [None] * num_tables
+    game_logs = {table: game.log for table, game in enumerate(games)}
+    while pending:
+        for player, player_seats in zip(players, seats):
+            queries = {table: query for table, query in pending.items() if query[0] is player_seats[table]}
+            if not queries:
+                continue
+            for table, action in player.query_tables(queries, game_logs).items():
+                try:
+                    pending[table] = plays[table].send(action)
+                except StopIteration as stop:
+                    results[table] = stop.value
+                    del pending[table]
+    for player in players:
+        player.stop()
+    return results
 
 
 if __name__ == '__main__':
-    Game().run()
+    if NUM_TABLES > 1:
+        run_tables(NUM_TABLES)
+    elif NUM_GAMES > 1:
+        run_batch(NUM_GAMES)
+    else:
+        Game().run()
@@ -0,0 +1,189 @@
+import re
+import sys
+import numpy as np
+
+"""
+    Reader and converter for the compact binary gamelog the engine writes with BINARY_GAME_LOG.
+    The layout is documented next to BinaryGameLog in engine.py.
+    Card codes are 13 * suit + rank (ranks 2..A, suits c, d, h, s), -1 for no card.
+    Actions are packed as code << 14 | amount with F, C, K, R coded 0, 1, 2, 3.
+"""
+
+MAX_ACTIONS = 40
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'), ('version', '<u2'), ('record_size', '<u2'),
+    ('names', 'S24', (2,)), ('padding', 'V8')])
+ROUND_DTYPE = np.dtype([
+    ('round', '<u4'),
+    ('first_seat', 'u1'),  # 0 if the first player in the header has the button, else 1
+    ('street', 'u1'),  # 0, 3, 4 or 5: the street the round ended on
+    ('num_actions', 'u1'),
+    ('flags', 'u1'),  # bit 0: more than MAX_ACTIONS actions, the rest were dropped
+    ('swaps', 'u1'),  # bit 4 * street + 2 * seat + card, flop swaps then turn swaps
+    ('hands', 'i1', (3, 2, 2)),  # preflop, flop, turn x seat x card
+    ('board', 'i1', (5,)),
+    ('deltas', '<i2', (2,)),  # by seat
+    ('actions', '<u2', (MAX_ACTIONS,))])
+
+RANKS = '23456789TJQKA'
+SUITS = 'cdhs'
+ACTION_CODES = 'FCKR'
+
+
+def encode_card(card):
+    """
+        @return card code of a card string such as 'As'
+    """
+    return 13 * SUITS.index(card[1]) + RANKS.index(card[0])
+
+def decode_card(code):
+    """
+        @return card string of a card code, None for -1
+    """
+    if code < 0:
+        return None
+    return RANKS[code % 13] + SUITS[code // 13]
+
+def decode_actions(record):
+    """
+        @return the actions of one round record in engine format ('F', 'C', 'K', 'R#')
+            * raise amounts are the total pip after the raise, as in the engine
+    """
+    actions = []
+    for packed in record['actions'][:record['num_actions']]:
+        code = ACTION_CODES[packed >> 14]
+        actions.append(code + str(packed & 0x3fff) if code == 'R' else code)
+    return actions
+
+def read_binary_gamelog(log_path):
+    """
+        @return (player names, records) for a binary gamelog
+            records is a read-only memory map of ROUND_DTYPE, so nothing is copied until used
+    """
+    header = np.fromfile(log_path, dtype=HEADER_DTYPE, count=1)[0]
+    assert(header['magic'] == b'PBGL' and header['version'] == 1)
+    assert(header['record_size'] == ROUND_DTYPE.itemsize)
+    names = [name.decode() for name in header['names']]
+    records = np.memmap(log_path, dtype=ROUND_DTYPE, mode='r', offset=HEADER_DTYPE.itemsize)
+    return names, records
+
+
+"""
+    @return (player names, records) parsed from a text gamelog
+    @param log_path, path to gamelog to be converted
+"""
+def parse_text_gamelog(log_path):
+    rx_dict = {
+        'title': re.compile(r'6\.176 MIT Pokerbots - (\S+) vs (\S+)'),
+        'round': re.compile(r'Round #(\d+), (\S+) \(-?\d+\), (\S+) \(-?\d+\)'),
+        'dealt': re.compile(r'(\S+) dealt \[(\S\S) (\S\S)\]'),
+        'hand': re.compile(r'(\S+)\'s hand: \[(\S\S) (\S\S)\]'),
+        'board': re.compile(r'(?:Flop|Turn|River) \[((?:\S\S ?)+)\].*'),
+        'action': re.compile(r'(\S+) (folds|calls|checks|bets|raises to) ?(\d*)'),
+        'award': re.compile(r'(\S+) awarded (-?\d+)'),
+    }
+    phrasing = {'folds': 'F', 'calls': 'C', 'checks': 'K', 'bets': 'R', 'raises to': 'R'}
+    names = None
+    rounds = []
+    current = None
+    with open(log_path, 'r') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            match = lambda key: re.fullmatch(rx_dict[key], line)
+            round_match = match('round')
+            if round_match:
+                seats = list(round_match.groups()[1:])
+                current = {
+                    'round': int(round_match.groups()[0]),
+                    'first_seat': names.index(seats[0]),
+                    'seats': seats,
+                    'hands': [],
+                    'board': [],
+                    'actions': [],
+                    'deltas': [0, 0],
+                }
+                rounds.append(current)
+                continue
+            title_match = match('title')
+            if title_match:
+                names = list(title_match.groups())
+                continue
+            if current is None:
+                continue
+            dealt_match = match('dealt') or match('hand')
+            board_match = match('board')
+            action_match = match('action')
+            award_match = match('award')
+            if dealt_match:
+                name, card1, card2 = dealt_match.groups()
+                if current['seats'].index(name) == 0:
+                    current['hands'].append([[None, None], [None, None]])
+                current['hands'][-1][current['seats'].index(name)] = [encode_card(card1), encode_card(card2)]
+            elif board_match:
+                current['board'] = [encode_card(card) for card in board_match.groups()[0].split(' ')]
+            elif action_match:
+                name, phrase, amount = action_match.groups()
+                code = ACTION_CODES.index(phrasing[phrase]) << 14
+                current['actions'].append(code | int(amount) if amount else code)
+            elif award_match:
+                name, delta = award_match.groups()
+                current['deltas'][current['seats'].index(name)] = int(delta)
+    return names, rounds
+
+def to_records(rounds):
+    """
+        @return a ROUND_DTYPE array of the rounds from parse_text_gamelog
+    """
+    records = np.zeros(len(rounds), dtype=ROUND_DTYPE)
+    for i, current in enumerate(rounds):
+        record = records[i]
+        hands = np.full((3, 2, 2), -1)
+        hands[:len(current['hands'])] = current['hands'][:3]
+        swaps = 0
+        for street in range(min(len(current['hands']), 3) - 1):
+            changed = (hands[street] != hands[street + 1]).flatten()
+            for card in np.flatnonzero(changed):
+                swaps |= 1 << (4 * street + card)
+        board = current['board'] + [-1] * (5 - len(current['board']))
+        actions = current['actions'][:MAX_ACTIONS]
+        record['round'] = current['round']
+        record['first_seat'] = current['first_seat']
+        record['street'] = len(current['board'])
+        record['num_actions'] = len(actions)
+        record['flags'] = int(len(current['actions']) > MAX_ACTIONS)
+        record['swaps'] = swaps
+        record['hands'] = hands
+        record['board'] = board
+        record['deltas'] = current['deltas']
+        record['actions'][:len(actions)] = actions
+    return records
+
+def write_binary_gamelog(bin_path, names, records):
+    """
+        writes records to bin_path in the same format as the engine
+    """
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header['magic'] = b'PBGL'
+    header['version'] = 1
+    header['record_size'] = ROUND_DTYPE.itemsize
+    header['names'] = [name.encode() for name in names]
+    with open(bin_path, 'wb') as f:
+        header.tofile(f)
+        records.astype(ROUND_DTYPE).tofile(f)
+
+def convert(log_path, bin_path = None):
+    """
+        converts a text gamelog to a binary gamelog next to it (same name, .bin)
+        @return path of the binary gamelog
+    """
+    if bin_path is None:
+        bin_path = re.sub(r'\.txt$', '', log_path) + '.bin'
+    names, rounds = parse_text_gamelog(log_path)
+    write_binary_gamelog(bin_path, names, to_records(rounds))
+    return bin_path
+
+
+if __name__ == '__main__':
+    # converts the given text gamelogs, e.g. python binary_log.py gamelogs/*.txt
+    for log_path in sys.argv[1:]:
+        print('Converted', log_path, 'to', convert(log_path))
@@ -0,0 +1,31 @@
+import torch.nn as nn
+
+
+class Estimator(nn.Module):
+    """
+        a neural network which predicts the win percentage of a hand
+        the first few layers are meant to show the transitory probabilities between betting rounds
+        the next layers are used for actually calculating the win percentage given the info
+    """
+    def __init__(self, comm = 3) -> None:
+        super().__init__()
+        # two one-hot params per card
+        card_params = 13+4
+        input_size = (2+comm)*card_params
+        calc_layer_size = 24
+
+        # no activation between betting rounds because should just
+        # be a uniform distribution ie linear relationship
+        self.fc1 = nn.Linear(input_size, calc_layer_size)
+        self.fc2 = nn.Linear(calc_layer_size, calc_layer_size)
+        self.fc3 = nn.Linear(calc_layer_size, 1)  # output is a #
+
+    def forward(self, x):
+        seq = nn.Sequential(  # all hands should get to river
+          self.fc1, 
+          nn.ReLU(),
+          self.fc2,
+          nn.ReLU(),
+          self.fc3
+        )
+        return seq(x)
@@ -1,10 +1,7 @@
 from os import stat
 import eval7
 import random
-import numpy as np
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
+# torch is imported where the networks are used, so that calc_strength and one_hot load without it
 
 
 # we will train a nn to predict the w% of a hand.
@@ -143,36 +140,8 @@ def samples(_COMM = 0, hands = 100, _ITERS = 1000, swaps = True):
         Y.append(est)
     return X,Y
 
-class Estimator(nn.Module):
-    """
-        a neural network which predicts the win percentage of a hand
-        the first few layers are meant to show the transitory probabilities between betting rounds
-        the next layers are used for actually calculating the win percentage given the info
-    """
-    def __init__(self, comm = 3) -> None:
-        super().__init__()
-        # two one-hot params per card
-        card_params = 13+4
-        input_size = (2+comm)*card_params
-        calc_layer_size = 24
-
-        # no activation between betting rounds because should just
-        # be a uniform distribution ie linear relationship
-        self.fc1 = nn.Linear(input_size, calc_layer_size)
-        self.fc2 = nn.Linear(calc_layer_size, calc_layer_size)
-        self.fc3 = nn.Linear(calc_layer_size, 1)  # output is a #
-
-    def forward(self, x):
-        seq = nn.Sequential(  # all hands should get to river
-          self.fc1, 
-          nn.ReLU(),
-          self.fc2,
-          nn.ReLU(),
-          self.fc3
-        )
-        return seq(x)
-
 def train(net, params, data):
+    import torch
     lr = params["lr"]
     loss_func = params["loss function"]
     optimizer = params["optimizer"](net.parameters(), lr = lr)
@@ -197,6 +166,7 @@ def train(net, params, data):
         print('[%d, %5d] loss: %.3f' %(epoch + 1, csize, running_loss / hands))
 
 def test(net, params): # randomly sampled
+    import torch
     csize = params["csize"]
     hands = params["hands"]
     ITERS = params["ITERS"]
@@ -218,24 +188,33 @@ def test(net, params): # randomly sampled
 
 class StrengthNN:
     def __init__(self) -> None:
-        comms = [5,4,3,0]
-        self.nets = {}
-        for csize in comms:
+        self.nets = {}  # loaded on first use, so only the streets that are asked about are paid for
+
+    def net(self, csize):
+        """
+            @param csize: number of community cards
+            @return the estimator for csize community cards, loading it the first time
+        """
+        if csize not in self.nets:
+            import torch
+            from estimator import Estimator
             state_dict = torch.load('gamelog_parser/strength_inits/est'+str(csize)+".pth", map_location=torch.device('cpu'))
             model = Estimator(csize).to(torch.device('cpu'))
             model.load_state_dict(state_dict)
-            self.nets[csize] = model
             model.eval()
+            self.nets[csize] = model
+        return self.nets[csize]
 
     def calc(self, hole, board):
         """
             same format as mc calc_strength
             * swaps is assumed to be true
         """
+        import torch
         csize = len(board)
         input = torch.Tensor([one_hot(card, False) for card in hole+board])  # input is string
         input = input.flatten()
-        return self.nets[csize](input)[0]
+        return self.net(csize)(input)[0]
 
 
 if __name__ == "__main__":
@@ -10,6 +10,7 @@ from skeleton.states import GameState, TerminalState, RoundState
 from skeleton.states import NUM_ROUNDS, STARTING_STACK, BIG_BLIND, SMALL_BLIND
 from skeleton.bot import Bot
 from skeleton.runner import parse_args, run_bot
+from skeleton.equity import estimate
 
 class Player(Bot):
     '''
@@ -29,44 +30,6 @@ class Player(Bot):
         self.score = 0
         self.round = 0
         
-    def calc_strength(self,hole,board,iters):
-        deck = eval7.Deck()
-        hole_cards = [eval7.Card(card) for card in hole]
-        board_cards = [eval7.Card(card) for card in board]
-
-        for card in hole_cards+board_cards:
-            deck.cards.remove(card)
-
-        score = 0
-
-        for _ in range(iters):
-            deck.shuffle()
-
-            _OPP = 2
-            _COMM = 5 - len(board)
-
-            draw = deck.peek(_OPP+_COMM)
-
-            opp_hole = draw[:_OPP]
-            comm = draw[_OPP:]
-
-            our_hand = hole_cards + comm + board_cards
-            opp_hand  = opp_hole + comm + board_cards
-
-            our_hand_value =  eval7.evaluate(our_hand)
-            opp_hand_value = eval7.evaluate(opp_hand)
-
-            if our_hand_value > opp_hand_value:
-                score+=2
-            elif our_hand_value == opp_hand_value:
-                score+=1
-            else:
-                score+=0
-
-            hand_strength = score/(2*iters)
-
-        return hand_strength
-
     def handle_new_round(self, game_state, round_state, active):
         '''
         Called when a new round starts. Called NUM_ROUNDS times.
@@ -151,8 +114,7 @@ class Player(Bot):
         min_raise, max_raise = round_state.raise_bounds()
         pot_total = my_contribution + opp_contribution
 
-        _MONTE_CARLO_ITERS = 100
-        strength = self.calc_strength(my_cards, board_cards, _MONTE_CARLO_ITERS)
+        strength, _ = estimate(my_cards, board_cards)
 
         #need to add more randomization to betting
 
@@ -10,12 +10,15 @@ from skeleton.states import GameState, TerminalState, RoundState
 from skeleton.states import NUM_ROUNDS, STARTING_STACK, BIG_BLIND, SMALL_BLIND
 from skeleton.bot import Bot
 from skeleton.runner import parse_args, run_bot
+from skeleton.equity import estimate, estimate_tables
 
 class Player(Bot):
     '''
     A pokerbot.
     '''
 
+    MULTI_TABLE = True  # keeps no state of its own, so one process can play several tables
+
     def __init__(self):
         '''
         Called when a new game starts. Called exactly once.
@@ -26,71 +29,7 @@ class Player(Bot):
         Returns:
         Nothing.
         '''
-        self.score = 0
-        self.round = 0
-        
-    def calc_strength(self, hole, iters, community = []):
-        ''' 
-        Using MC with iterations to evalute hand strength 
-        Args: 
-        hole - our hole carsd 
-        iters - number of times we run MC 
-        community - community cards
-        '''
-
-        deck = eval7.Deck() # deck of cards
-        hole_cards = [eval7.Card(card) for card in hole] # our hole cards in eval7 friendly format
-
-        if community != []:
-            community_cards = [eval7.Card(card) for card in community]
-            for card in community_cards: #removing the current community cards from the deck
-                deck.cards.remove(card)
-
-        for card in hole_cards: #removing our hole cards from the deck
-            deck.cards.remove(card)
         
-        #may need to fix this later 
-        
-        
-        score = 0 
-
-        for _ in range(iters): # MC the probability of winning
-            deck.shuffle()
-
-            _COMM = 5 - len(community)
-            _OPP = 2 
-
-            draw = deck.peek(_COMM + _OPP)  
-            
-            opp_hole = draw[:_OPP]
-            alt_community = draw[_OPP:]
-
-            
-            if community == []:
-                our_hand = hole_cards  + alt_community
-                opp_hand = opp_hole  + alt_community
-            else: 
-
-                our_hand = hole_cards + community_cards + alt_community
-                opp_hand = opp_hole + community_cards + alt_community
-
-
-            our_hand_value = eval7.evaluate(our_hand)
-            opp_hand_value = eval7.evaluate(opp_hand)
-
-            if our_hand_value > opp_hand_value:
-                score += 2 
-
-            if our_hand_value == opp_hand_value:
-                score += 1 
-
-            else: 
-                score += 0        
-
-        hand_strength = score/(2*iters) # win probability 
-
-        return hand_strength
-
     def handle_new_round(self, game_state, round_state, active):
         '''
         Called when a new round starts. Called NUM_ROUNDS times.
@@ -126,9 +65,6 @@ class Player(Bot):
         street = previous_state.street  # 0, 3, 4, or 5 representing when this round ended
         my_cards = previous_state.hands[active]  # your cards
         opp_cards = previous_state.hands[1-active]  # opponent's cards or [] if not revealed
-        
-        self.score += my_delta #keep track of score
-        self.round += 1 #keep track of round number
 
     def get_action(self, game_state, round_state, active):
         '''
@@ -140,6 +76,38 @@ class Player(Bot):
         round_state: the RoundState object.
         active: your player's index.
 
+        Returns:
+        Your action.
+        '''
+        strength, _ = estimate(round_state.hands[active], round_state.deck[:round_state.street])
+        return self.choose_action(game_state, round_state, active, strength)
+
+    def get_actions(self, decisions):
+        '''
+        Called with every pending decision when the engine plays several tables on one connection.
+        Estimates the strength on every table together, then decides each table as get_action does.
+
+        Arguments:
+        decisions: a dict of (game_state, round_state, active) tuples by table number.
+
+        Returns:
+        A dict of your actions by table number.
+        '''
+        strengths = estimate_tables([(round_state.hands[active], round_state.deck[:round_state.street], 0.)
+                                     for _, round_state, active in decisions.values()])
+        return {table: self.choose_action(*decision, strength)
+                for (table, decision), (strength, _) in zip(decisions.items(), strengths)}
+
+    def choose_action(self, game_state, round_state, active, strength):
+        '''
+        Picks the action for a decision given our strength.
+
+        Arguments:
+        game_state: the GameState object.
+        round_state: the RoundState object.
+        active: your player's index.
+        strength: our estimated chance of winning at showdown.
+
         Returns:
         Your action.
         '''
@@ -163,8 +131,9 @@ class Player(Bot):
         min_raise, max_raise = round_state.raise_bounds()
         pot_total = my_contribution + opp_contribution
 
-        fold_cost = BIG_BLIND*math.ceil((NUM_ROUNDS - self.round)/2) + SMALL_BLIND*math.ceil((NUM_ROUNDS - self.round)/2)
-        if self.score - fold_cost > 2:
+        rounds_played = game_state.round_num - 1  # from the game state, which is kept per table
+        fold_cost = BIG_BLIND*math.ceil((NUM_ROUNDS - rounds_played)/2) + SMALL_BLIND*math.ceil((NUM_ROUNDS - rounds_played)/2)
+        if game_state.bankroll - fold_cost > 2:
             return CheckAction() if CheckAction in legal_actions else FoldAction()
 
         # raise logic 
@@ -186,12 +155,6 @@ class Player(Bot):
         else:
             temp_action = FoldAction() 
 
-        _MONTE_CARLO_ITERS = 100
-        if street <3:
-            strength = self.calc_strength(my_cards, _MONTE_CARLO_ITERS)
-        else:
-            strength = self.calc_strength(my_cards, _MONTE_CARLO_ITERS, board_cards)
-
         if continue_cost > 0: 
             _SCARY = 0
             if continue_cost > 6:
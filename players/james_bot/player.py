@@ -6,6 +6,7 @@ from skeleton.states import GameState, TerminalState, RoundState
 from skeleton.states import NUM_ROUNDS, STARTING_STACK, BIG_BLIND, SMALL_BLIND
 from skeleton.bot import Bot
 from skeleton.runner import parse_args, run_bot
+from skeleton.equity import estimate
 
 import eval7
 import random
@@ -53,56 +54,6 @@ class Player(Bot):
         return min(1, amount/(self.rounds*1.5-self.total))
 
     
-    def calc_strength(self, hole, iters):
-        '''
-        A Monte carlo method that estimates the win probability of a pair of hole cards 
-
-        Args:
-        hole: list of 2 hole cards 
-        iters: number of times the sim is run
-        '''
-
-        deck = eval7.Deck() #deck of cards
-        hole_cards = [eval7.Card(card) for card in hole] #list of our hole cards
-
-        for card in hole_cards:
-            deck.cards.remove(card)
-
-        score = 0
-
-        for _ in range(iters):
-            deck.shuffle()
-
-            _COMM = 5 
-            _OPP = 2
-
-            draw = deck.peek(_COMM+_OPP)
-
-            opp_hole = draw[:_OPP]
-            community = draw[_OPP:]
-
-            our_hand = hole_cards + community
-            opp_hand = opp_hole + community
-
-            our_hand_value = eval7.evaluate(our_hand)
-            opp_hand_value = eval7.evaluate(opp_hand)
-
-            if our_hand_value > opp_hand_value:
-                score += 2 
-            
-            if our_hand_value == opp_hand_value:
-                score += 1 
-            
-            else:
-                score += 0
-        
-        hand_strength = score/(2*iters)
-
-        return hand_strength
-
-
-
-
     def handle_new_round(self, game_state, round_state, active):
         '''
         Called when a new round starts. Called NUM_ROUNDS times.
@@ -189,8 +140,7 @@ class Player(Bot):
         else:
             temp_action = FoldAction()
 
-        _MONTE_CARLO_ITERS = 100
-        strength = self.calc_strength(my_cards, _MONTE_CARLO_ITERS)
+        strength, _ = estimate(my_cards)
 
         if continue_cost > 0:
             _SCARY = 0 
@@ -6,6 +6,8 @@ from skeleton.states import GameState, TerminalState, RoundState
 from skeleton.states import NUM_ROUNDS, STARTING_STACK, BIG_BLIND, SMALL_BLIND
 from skeleton.bot import Bot
 from skeleton.runner import parse_args, run_bot
+from skeleton.equity import estimate
+from skeleton.budget import TimeBudget
 
 import eval7
 import random
@@ -26,56 +28,19 @@ class Player(Bot):
         Returns:
         Nothing.
         '''
+        self.budget = TimeBudget()  # spreads the game clock over the Monte Carlo estimates
     
-    def calc_strength(self, hole, iters):
+    def handle_new_game(self):
         '''
-        A Monte carlo method that estimates the win probability of a pair of hole cards 
-
-        Args:
-        hole: list of 2 hole cards 
-        iters: number of times the sim is run
-        '''
-
-        deck = eval7.Deck() #deck of cards
-        hole_cards = [eval7.Card(card) for card in hole] #list of our hole cards
-
-        for card in hole_cards:
-            deck.cards.remove(card)
-
-        score = 0
-
-        for _ in range(iters):
-            deck.shuffle()
-
-            _COMM = 5 
-            _OPP = 2
-
-            draw = deck.peek(_COMM+_OPP)
-
-            opp_hole = draw[:_OPP]
-            community = draw[_OPP:]
-
-            our_hand = hole_cards + community
-            opp_hand = opp_hole + community
-
-            our_hand_value = eval7.evaluate(our_hand)
-            opp_hand_value = eval7.evaluate(opp_hand)
-
-            if our_hand_value > opp_hand_value:
-                score += 2 
-            
-            if our_hand_value == opp_hand_value:
-                score += 1 
-            
-            else:
-                score += 0
-        
-        hand_strength = score/(2*iters)
-
-        return hand_strength
-
+        Called when the engine starts another game on the same connection.
 
+        Arguments:
+        Nothing.
 
+        Returns:
+        Nothing.
+        '''
+        self.budget.reset()  # its decision count belongs to the last game
 
     def handle_new_round(self, game_state, round_state, active):
         '''
@@ -126,6 +91,7 @@ class Player(Bot):
         Returns:
         Your action.
         '''
+        self.budget.start(game_state)
         legal_actions = round_state.legal_actions()  # the actions you are allowed to take
         street = round_state.street  # 0, 3, 4, or 5 representing pre-flop, flop, turn, or river respectively
         my_cards = round_state.hands[active]  # your cards
@@ -163,8 +129,8 @@ class Player(Bot):
         else:
             temp_action = FoldAction()
 
-        _MONTE_CARLO_ITERS = 100
-        strength = self.calc_strength(my_cards, _MONTE_CARLO_ITERS)
+        _MONTE_CARLO_ITERS = 20000
+        strength, _ = estimate(my_cards, iters=_MONTE_CARLO_ITERS, deadline=self.budget.deadline)
 
         if continue_cost > 0:
             _SCARY = 0 
@@ -9,6 +9,8 @@ from skeleton.states import GameState, TerminalState, RoundState
 from skeleton.states import NUM_ROUNDS, STARTING_STACK, BIG_BLIND, SMALL_BLIND
 from skeleton.bot import Bot
 from skeleton.runner import parse_args, run_bot
+from skeleton.equity import estimate, EquitySamples
+from skeleton.budget import TimeBudget
 
 class Player(Bot):
     '''
@@ -25,44 +27,46 @@ class Player(Bot):
         Returns:
         Nothing.
         '''
+        self.budget = TimeBudget()  # spreads the game clock over the Monte Carlo estimates
+        self.equity_cache = {}  # EquitySamples by (hole, board), sampled while waiting on the engine
         
-    def calc_strength(self,hole,board,iters):
-        deck = eval7.Deck()
-        hole_cards = [eval7.Card(card) for card in hole]
-        board_cards = [eval7.Card(card) for card in board]
-
-        for card in hole_cards+board_cards:
-            deck.cards.remove(card)
-
-        score = 0
-
-        for _ in range(iters):
-            deck.shuffle()
-
-            _OPP = 2
-            _COMM = 5 - len(board)
-
-            draw = deck.peek(_OPP+_COMM)
-
-            opp_hole = draw[:_OPP]
-            comm = draw[_OPP:]
-
-            our_hand = hole_cards + comm + board_cards
-            opp_hand  = opp_hole + comm + board_cards
-
-            our_hand_value =  eval7.evaluate(our_hand)
-            opp_hand_value = eval7.evaluate(opp_hand)
+    def precompute(self, game_state, round_state, active):
+        '''
+        While the opponent thinks on the flop or turn, samples our strength on every card that could come next.
+        '''
+        if round_state is None or isinstance(round_state, TerminalState) or round_state.street not in (3, 4):
+            return None
+        return self.sample_next_cards(round_state.hands[active], round_state.deck[:round_state.street])
 
-            if our_hand_value > opp_hand_value:
-                score+=2
-            elif our_hand_value == opp_hand_value:
-                score+=1
+    def sample_next_cards(self,hole,board):
+        '''
+        Generator that samples our strength on each possible next board, one Monte Carlo pass per step.
+        '''
+        _PRECOMPUTE_ITERS = 2000  # samples per next board, topped up on the clock if there is time
+        seen = set(hole + board)
+        next_boards = [board + [card] for card in map(str, eval7.Deck().cards) if card not in seen]
+
+        for next_board in next_boards:
+            key = (tuple(hole), tuple(next_board))
+            if key in self.equity_cache:  # sampled after an earlier decision on this street
+                samples = self.equity_cache[key]
             else:
-                score+=0
+                samples = self.equity_cache[key] = EquitySamples(hole, next_board)
+            while not samples.done(_PRECOMPUTE_ITERS):
+                samples.sample()
+                yield
 
-            hand_strength = score/(2*iters)
+    def handle_new_game(self):
+        '''
+        Called when the engine starts another game on the same connection.
 
-        return hand_strength
+        Arguments:
+        Nothing.
+
+        Returns:
+        Nothing.
+        '''
+        self.budget.reset()  # its decision count belongs to the last game
 
     def handle_new_round(self, game_state, round_state, active):
         '''
@@ -76,6 +80,7 @@ class Player(Bot):
         Returns:
         Nothing.
         '''
+        self.equity_cache.clear()
         my_bankroll = game_state.bankroll  # the total number of chips you've gained or lost from the beginning of the game to the start of this round
         game_clock = game_state.game_clock  # the total number of seconds your bot has left to play this game
         round_num = game_state.round_num  # the round number from 1 to NUM_ROUNDS
@@ -115,6 +120,7 @@ class Player(Bot):
         Returns:
         Your action.
         '''
+        self.budget.start(game_state)
         legal_actions = round_state.legal_actions()  # the actions you are allowed to take
         street = round_state.street  # 0, 3, 4, or 5 representing pre-flop, flop, turn, or river respectively
         my_cards = round_state.hands[active]  # your cards
@@ -135,8 +141,10 @@ class Player(Bot):
         min_raise, max_raise = round_state.raise_bounds()
         pot_total = my_contribution + opp_contribution
 
-        _MONTE_CARLO_ITERS = 100
-        strength = self.calc_strength(my_cards, board_cards, _MONTE_CARLO_ITERS)
+        _MONTE_CARLO_ITERS = 20000
+        # precomputed samples count towards the iterations, only the rest are taken on the clock
+        strength, _ = estimate(my_cards, board_cards, iters=_MONTE_CARLO_ITERS, deadline=self.budget.deadline,
+                               samples=self.equity_cache.get((tuple(my_cards), tuple(board_cards))))
 
         #raise logic
         x,y = random.random(),random.random()
@@ -0,0 +1,131 @@
+'''
+Monte Carlo equity of a hand against a random opponent hand, shared by the pokerbots.
+'''
+import random
+import time
+
+import eval7
+
+# every two-card hand; eval7 deals the opponent the live ones in turn, so samples come in whole passes over them
+RANDOM_HAND = eval7.HandRange('22+,A2+,K2+,Q2+,J2+,T2+,92+,82+,72+,62+,52+,42+,32')
+CARDS = {str(card): card for card in eval7.Deck().cards}
+
+
+def swap_probability(street, flop_percent, turn_percent):
+    '''
+    Returns the chance that a hole card is swapped between street and showdown.
+    '''
+    if street == 0:
+        return 1 - (1 - flop_percent) * (1 - turn_percent)
+    if street == 3:
+        return turn_percent
+    return 0.
+
+
+class EquitySamples():
+    '''
+    The Monte Carlo passes taken so far for one hand, board and swap chance.
+    Keep one to add samples to it later, e.g. a precomputed estimate topped up on the clock.
+
+    With swaps the equity mixes the hand as dealt, with one card replaced and with both replaced.
+    The last is a random hand against a random hand, so exactly one half, and the other two are
+    sampled by eval7's compiled Monte Carlo in passes over the opponent's live hands. The card swapped
+    out is not removed from the deck, which biases the one-swap term very slightly.
+    '''
+
+    def __init__(self, hole, board=(), swap=0.):
+        self.unseen = [card for name, card in CARDS.items() if name not in hole and name not in board]
+        self.hand = [CARDS[card] for card in hole]
+        self.board = [CARDS[card] for card in board]
+        self.swap = swap
+        self.weights = ((1 - swap) ** 2, 2 * swap * (1 - swap))
+        self.kinds = [kind for kind in (0, 1) if self.weights[kind] > 0]
+        self.pass_samples = (50 - len(board)) * (49 - len(board)) // 2
+        self.passes = ([], [])
+        self.samples = 0
+
+    def ready(self):
+        '''
+        Returns True once every kind has two passes, so the variance is defined.
+        '''
+        return all(len(self.passes[kind]) >= 2 for kind in self.kinds)
+
+    def sample(self):
+        '''
+        Takes one more pass: two of each kind first, then in proportion to the weights.
+        '''
+        if not self.kinds:
+            return
+        weights = self.weights
+        passes = self.passes
+        kind = min(self.kinds, key=lambda kind: (len(passes[kind]) >= 2, len(passes[kind]) / weights[kind]))
+        cards = self.hand if kind == 0 else [self.hand[random.randrange(2)], random.choice(self.unseen)]
+        passes[kind].append(eval7.py_hand_vs_range_monte_carlo(cards, RANDOM_HAND, self.board, self.pass_samples))
+        self.samples += self.pass_samples
+
+    def done(self, iters, deadline=None):
+        '''
+        Returns True once the samples are ready and iters are taken or the deadline has passed.
+        '''
+        if not self.kinds:  # both cards are always swapped, nothing to sample
+            return True
+        return self.ready() and (self.samples >= iters or (deadline is not None and time.perf_counter() >= deadline))
+
+    def result(self):
+        '''
+        Returns the equity estimate and its variance, pooling every pass taken so far.
+        '''
+        mean = self.swap ** 2 / 2
+        variance = 0.
+        for kind in self.kinds:
+            count = len(self.passes[kind])
+            kind_mean = sum(self.passes[kind]) / count
+            kind_variance = sum((equity - kind_mean) ** 2 for equity in self.passes[kind]) / (count - 1)
+            mean += self.weights[kind] * kind_mean
+            variance += self.weights[kind] ** 2 * kind_variance / count
+        return mean, variance
+
+
+def estimate(hole, board=(), swap=0., iters=2000, deadline=None, samples=None):
+    '''
+    Estimates the chance that hole beats a random hand at showdown, ties counting half.
+
+    Arguments:
+    hole: our two cards, as strings like 'As'.
+    board: the board cards so far.
+    swap: the chance that each hole card is swapped before showdown, see swap_probability.
+    iters: the samples to take.
+    deadline: a time.perf_counter() value to stop sampling at, if it comes before iters.
+    samples: the EquitySamples of the same hand, board and swap to continue, if any. Its passes
+    count towards iters and are pooled with the new ones.
+
+    Returns:
+    The equity estimate and its variance. At least two passes are sampled, so the variance is defined.
+    '''
+    if samples is None:
+        samples = EquitySamples(hole, board, swap)
+    while not samples.done(iters, deadline):
+        samples.sample()
+    return samples.result()
+
+
+def estimate_tables(situations, iters=2000, deadline=None):
+    '''
+    Estimates several hands at once, e.g. the pending decisions of every table, sharing one deadline.
+    Passes are taken round robin, so the hands get equal samples however early the deadline comes.
+
+    Arguments:
+    situations: a list of (hole, board, swap) tuples, as estimate takes them.
+    iters: the samples to take for each hand.
+    deadline: a time.perf_counter() value to stop sampling at, if it comes before iters.
+
+    Returns:
+    A list of (estimate, variance) tuples, in the order of situations.
+    '''
+    samples = [EquitySamples(hole, board, swap) for hole, board, swap in situations]
+    pending = samples
+    while pending:
+        for hand_samples in pending:
+            hand_samples.sample()
+        pending = [hand_samples for hand_samples in pending if not hand_samples.done(iters, deadline)]
+    return [hand_samples.result() for hand_samples in samples]
@@ -2,8 +2,6 @@
 Simple example pokerbot, written in Python.
 '''
 
-from json import decoder
-from re import L
 import eval7
 import random
 import math
@@ -12,7 +10,7 @@ from skeleton.states import GameState, TerminalState, RoundState
 from skeleton.states import NUM_ROUNDS, STARTING_STACK, BIG_BLIND, SMALL_BLIND
 from skeleton.bot import Bot
 from skeleton.runner import parse_args, run_bot
-import json
+from skeleton.tables import preflop_table
 
 class Player(Bot):
     '''
@@ -47,8 +45,7 @@ class Player(Bot):
 
         self.limps = 0
 
-        with open("./data/preflop_ev.json") as f:
-            self.ev = json.load(f)
+        self.ev = preflop_table("./data/preflop_ev.bin") # compiled from preflop_ev.json, see skeleton/tables.py
     
     def hand_format(self,hand):
         card_rank = {'2':1,'3':2,'4':3,'5':4,'6':5,'7':6,'8':7,'9':8,'T':9,'J':10,'Q':11,'K':12,'A':13}
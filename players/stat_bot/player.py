@@ -2,10 +2,6 @@
 Simple example pokerbot, written in Python.
 '''
 
-from ast import Raise
-from cgitb import small
-from json import decoder
-from re import L
 import eval7
 import random
 import math
@@ -14,7 +10,8 @@ from skeleton.states import GameState, TerminalState, RoundState
 from skeleton.states import NUM_ROUNDS, STARTING_STACK, BIG_BLIND, SMALL_BLIND
 from skeleton.bot import Bot
 from skeleton.runner import parse_args, run_bot
-import json
+from skeleton.budget import TimeBudget
+from skeleton.tables import preflop_table
 
 class Player(Bot):
     '''
@@ -31,6 +28,7 @@ class Player(Bot):
         Returns:
         Nothing.
         '''
+        self.budget = TimeBudget()  # spreads the game clock over the Monte Carlo estimates
         self.score = 0
         self.round = 0
 
@@ -56,8 +54,7 @@ class Player(Bot):
 
         self.limps = 0
 
-        with open("./data/preflop_ev.json") as f:
-            self.ev = json.load(f)
+        self.ev = preflop_table("./data/preflop_ev.bin") # compiled from preflop_ev.json, see skeleton/tables.py
     
     def hand_format(self,hand):
         
@@ -68,12 +65,12 @@ class Player(Bot):
         else:
             return hand[1][0]+hand[0][0]+x
 
-    def calc_strength(self, hole, iters, community,swap_odd):
+    def calc_strength(self, hole, min_iters, max_iters, community,swap_odd):
         ''' 
         Using MC with iterations to evalute hand strength 
         Args: 
         hole - our hole carsd 
-        iters - number of times we run MC 
+        min_iters, max_iters - bounds on the number of times we run MC, it runs until the decision's deadline in between
         community - community cards
         '''
         if len(community) == 0:
@@ -105,7 +102,9 @@ class Player(Bot):
         num_ignored = 0
         hand_samples = 0
 
-        for _ in range(iters): # MC the probability of winning
+        iters = 0
+        for _ in self.budget.iterations(min_iters, max_iters): # MC the probability of winning
+            iters += 1
             deck.shuffle()
 
             _COMM = 5 - len(community)
@@ -177,6 +176,18 @@ class Player(Bot):
     def all_hands(self,hole,community):
         pass
 
+    def handle_new_game(self):
+        '''
+        Called when the engine starts another game on the same connection.
+
+        Arguments:
+        Nothing.
+
+        Returns:
+        Nothing.
+        '''
+        self.budget.reset()  # its decision count belongs to the last game
+
     def handle_new_round(self, game_state, round_state, active):
         '''
         Called when a new round starts. Called NUM_ROUNDS times.
@@ -240,6 +251,7 @@ class Player(Bot):
         Returns:
         Your action.
         '''
+        self.budget.start(game_state)
         legal_actions = round_state.legal_actions()  # the actions you are allowed to take
         street = round_state.street  # 0, 3, 4, or 5 representing pre-flop, flop, turn, or river respectively
         my_cards = round_state.hands[active]  # your cards
@@ -313,14 +325,15 @@ class Player(Bot):
         ###################
         # remove cards that would be folded preflop from strength calc
         #######STRENGTH#######
-        _MONTE_CARLO_ITERS = 250
+        _MIN_MONTE_CARLO_ITERS = 60
+        _MAX_MONTE_CARLO_ITERS = 2000
         if street <3:
-            strength = self.calc_strength(my_cards, _MONTE_CARLO_ITERS,[],0.1)
+            strength = self.calc_strength(my_cards, _MIN_MONTE_CARLO_ITERS, _MAX_MONTE_CARLO_ITERS,[],0.1)
         elif street == 3:
-            strength = self.calc_strength(my_cards, _MONTE_CARLO_ITERS,board_cards,0.05)
+            strength = self.calc_strength(my_cards, _MIN_MONTE_CARLO_ITERS, _MAX_MONTE_CARLO_ITERS,board_cards,0.05)
             
         else:
-            strength = self.calc_strength(my_cards, _MONTE_CARLO_ITERS, board_cards, 0)
+            strength = self.calc_strength(my_cards, _MIN_MONTE_CARLO_ITERS, _MAX_MONTE_CARLO_ITERS, board_cards, 0)
 
         if not self.strength:
             self.strength = strength
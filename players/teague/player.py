@@ -9,6 +9,8 @@ from skeleton.states import GameState, TerminalState, RoundState
 from skeleton.states import NUM_ROUNDS, STARTING_STACK, BIG_BLIND, SMALL_BLIND
 from skeleton.bot import Bot
 from skeleton.runner import parse_args, run_bot
+from skeleton.equity import estimate
+from skeleton.budget import TimeBudget
 import math
 
 class Player(Bot):
@@ -25,45 +27,21 @@ class Player(Bot):
         Nothing.
         '''
 
+        self.budget = TimeBudget()  # spreads the game clock over the Monte Carlo estimates
         self.score = 0
         self.round = 0
         
-    def calc_strength(self,hole,board,iters):
-        deck = eval7.Deck()
-        hole_cards = [eval7.Card(card) for card in hole]
-        board_cards = [eval7.Card(card) for card in board]
-
-        for card in hole_cards + board_cards:
-            deck.cards.remove(card)
-
-        score = 0
-
-        for _ in range(iters):
-            deck.shuffle()
-
-            _OPP = 2
-            _COMM = 5 - len(board)
-
-            draw = deck.peek(_OPP + _COMM)
-            opp_hole = draw[:_OPP]
-            comm = draw[_OPP:]
-
-            our_hand = hole_cards + comm + board_cards
-            opp_hand  = opp_hole + comm + board_cards
-
-            our_hand_value =  eval7.evaluate(our_hand)
-            opp_hand_value = eval7.evaluate(opp_hand)
-
-            if our_hand_value > opp_hand_value:
-                score += 2
-            elif our_hand_value == opp_hand_value:
-                score += 1
-            else:
-                score += 0
-
-            hand_strength = score/(2*iters)
-
-        return hand_strength
+    def handle_new_game(self):
+        '''
+        Called when the engine starts another game on the same connection.
+        Arguments:
+        Nothing.
+        Returns:
+        Nothing.
+        '''
+        self.budget.reset()  # its decision count belongs to the last game
+        self.score = 0
+        self.round = 0
 
     def handle_new_round(self, game_state, round_state, active):
         '''
@@ -123,6 +101,7 @@ class Player(Bot):
         Returns:
         Your action.
         '''
+        self.budget.start(game_state)
         legal_actions = round_state.legal_actions()  # the actions you are allowed to take
         street = round_state.street  # 0, 3, 4, or 5 representing pre-flop, flop, turn, or river respectively
         my_cards = round_state.hands[active]  # your cards
@@ -142,8 +121,9 @@ class Player(Bot):
         min_raise, max_raise = round_state.raise_bounds()
         pot_total = my_contribution + opp_contribution
 
-        _MONTE_CARLO_ITERS = 100
-        strength = self.calc_strength(my_cards, board_cards, _MONTE_CARLO_ITERS)*self.bet_weight()
+        _MONTE_CARLO_ITERS = 20000
+        strength, _ = estimate(my_cards, board_cards, iters=_MONTE_CARLO_ITERS, deadline=self.budget.deadline)
+        strength *= self.bet_weight()
 
 
         if street == 3: # flop
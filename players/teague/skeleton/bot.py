@@ -8,6 +8,21 @@ class Bot():
     The base class for a pokerbot.
     '''
 
+    # set to True to play several tables on one connection, see get_actions
+    MULTI_TABLE = False
+
+    def handle_new_game(self):
+        '''
+        Called when the engine starts another game on the same connection.
+        Override to reset any state kept across rounds.
+
+        Arguments:
+        Nothing.
+
+        Returns:
+        Nothing.
+        '''
+
     def handle_new_round(self, game_state, round_state, active):
         '''
         Called when a new round starts. Called NUM_ROUNDS times.
@@ -50,3 +65,37 @@ class Bot():
         Your action.
         '''
         raise NotImplementedError('get_action')
+
+    def precompute(self, game_state, round_state, active):
+        '''
+        Called after each response, while the engine waits on your opponent.
+        Override to return a generator of speculative work, e.g. equities for the cards that could
+        come next, cached on self for get_action to pick up. The skeleton takes one step per yield
+        and drops the generator as soon as the engine's next message arrives, so keep steps short.
+        Not called when the engine plays several tables on one connection or runs you in-process.
+
+        Arguments:
+        game_state: the GameState object.
+        round_state: the RoundState or TerminalState object.
+        active: your player's index.
+
+        Returns:
+        An iterable of work steps, or None.
+        '''
+        return None
+
+    def get_actions(self, decisions):
+        '''
+        Called with every pending decision when the engine plays several tables on one connection,
+        which the skeleton only accepts if MULTI_TABLE is True. Override to evaluate the tables together,
+        e.g. with skeleton.equity.estimate_tables; the default asks get_action for each in turn.
+        The other callbacks do not say which table they are for, so a pokerbot that plays several tables
+        must not keep per-round or per-game state on self: game_state has each table's bankroll and round.
+
+        Arguments:
+        decisions: a dict of (game_state, round_state, active) tuples by table number.
+
+        Returns:
+        A dict of your actions by table number.
+        '''
+        return {table: self.get_action(*decision) for table, decision in decisions.items()}
@@ -0,0 +1,79 @@
+'''
+Splits the game clock across the decisions left in the game, so that anytime computations
+can use the spare time without running the clock out.
+'''
+import time
+
+from .states import NUM_ROUNDS
+
+# seconds of the game clock never handed out, for the engine's round trips and slow decisions
+RESERVE_SECONDS = 2.
+# fraction of the rest that decisions may spend, the remainder absorbs the skeleton's own overhead
+SPEND_FRACTION = 0.8
+# decisions per round assumed until the bot has played a round
+DECISIONS_PER_ROUND = 3.
+
+
+class TimeBudget():
+    '''
+    Hands each decision a deadline based on the remaining game clock and rounds.
+
+    Call start() at the top of get_action, then poll expired() or loop over iterations()
+    in anything that can stop early, and reset() in handle_new_game. Decisions per round are
+    learned as the game goes. One budget follows one game's clock, so a bot with a budget
+    plays a single table (it leaves Bot.MULTI_TABLE False).
+    '''
+
+    def __init__(self, reserve=RESERVE_SECONDS, spend_fraction=SPEND_FRACTION):
+        self.reserve = reserve
+        self.spend_fraction = spend_fraction
+        self.deadline = time.perf_counter()
+        self.reset()
+
+    def reset(self):
+        '''
+        Forgets the decisions counted so far, for a new game on the same connection.
+        '''
+        self.first_round = None
+        self.decisions = 0
+
+    def start(self, game_state):
+        '''
+        Starts a decision and returns the seconds it may spend.
+        '''
+        if self.first_round is None or game_state.round_num < self.first_round:  # a new game
+            self.first_round = game_state.round_num
+            self.decisions = 0
+        rounds_played = game_state.round_num - self.first_round
+        per_round = max(self.decisions / rounds_played, 1.) if rounds_played > 0 else DECISIONS_PER_ROUND
+        decisions_left = (NUM_ROUNDS - game_state.round_num + 1) * per_round
+        spare = max(game_state.game_clock - self.reserve, 0.) * self.spend_fraction
+        seconds = spare / max(decisions_left, 1.)
+        self.decisions += 1
+        self.deadline = time.perf_counter() + seconds
+        return seconds
+
+    def remaining(self):
+        '''
+        Returns the seconds left before the deadline, never negative.
+        '''
+        return max(self.deadline - time.perf_counter(), 0.)
+
+    def expired(self):
+        '''
+        Returns True once the current decision's deadline has passed.
+        '''
+        return time.perf_counter() >= self.deadline
+
+    def iterations(self, minimum=1, maximum=None):
+        '''
+        Counts loop iterations until the deadline: always at least minimum, never more than maximum.
+        '''
+        count = 0
+        deadline = self.deadline
+        clock = time.perf_counter
+        while maximum is None or count < maximum:
+            if count >= minimum and clock() >= deadline:
+                return
+            yield count
+            count += 1
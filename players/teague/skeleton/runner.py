@@ -2,113 +2,279 @@
 The infrastructure for interacting with the engine.
 '''
 import argparse
+import select
 import socket
+import struct
 from .actions import FoldAction, CallAction, CheckAction, RaiseAction
 from .states import GameState, TerminalState, RoundState
 from .states import STARTING_STACK, BIG_BLIND, SMALL_BLIND, FLOP_PERCENT, TURN_PERCENT
 from .bot import Bot
 
+# binary wire protocol, offered by the engine with the line Y1 (see engine.py)
+WIRE_VERSION = 'Y1'
+WIRE_LENGTH = struct.Struct('<H')
+WIRE_ARGUMENTS = {'T': struct.Struct('<I'), 'P': struct.Struct('<B'), 'R': struct.Struct('<H'), 'D': struct.Struct('<h'),
+                  'I': struct.Struct('<H')}
+WIRE_RESET = struct.Struct('<Ii')
+WIRE_CARDS = [rank + suit for suit in 'cdhs' for rank in '23456789TJQKA']
+
 
 class Runner():
     '''
     Interacts with the engine.
     '''
 
-    def __init__(self, pokerbot, socketfile):
+    def __init__(self, pokerbot, socketfile, connection=None):
         self.pokerbot = pokerbot
         self.socketfile = socketfile
+        self.connection = connection  # the socket under socketfile, polled while precomputing
+        self.game_state = GameState(0, 0., 1)
+        self.round_state = None
+        self.active = 0
+        self.round_flag = True
+        self.binary = False
+        self.tables = {}
+        self.work = None
 
     def receive(self):
         '''
         Generator for incoming messages from the engine.
         '''
         while True:
-            packet = self.socketfile.readline().strip().split(' ')
+            self.think()
+            if self.binary:
+                header = self.socketfile.buffer.read(WIRE_LENGTH.size)
+                if len(header) < WIRE_LENGTH.size:
+                    break
+                packet = self.decode(self.socketfile.buffer.read(WIRE_LENGTH.unpack(header)[0]))
+            else:
+                packet = self.socketfile.readline().strip().split(' ')
             if not packet:
                 break
             yield packet
 
+    def think(self):
+        '''
+        Runs the pokerbot's precompute steps until the engine's next message arrives or the work runs out.
+        The engine sends one message per response, so nothing is waiting in the socket file's buffer.
+        '''
+        if self.work is None or self.connection is None:
+            return
+        work, self.work = self.work, None
+        for _ in work:
+            if select.select([self.connection], [], [], 0)[0]:
+                break
+
+    def decode(self, payload):
+        '''
+        Decodes a binary wire protocol message into the engine's text clauses.
+        '''
+        packet = []
+        i = 0
+        while i < len(payload):
+            opcode = chr(payload[i])
+            i += 1
+            if opcode in WIRE_ARGUMENTS:
+                value = WIRE_ARGUMENTS[opcode].unpack_from(payload, i)[0]
+                i += WIRE_ARGUMENTS[opcode].size
+                packet.append(opcode + (str(value / 1000) if opcode == 'T' else str(value)))
+            elif opcode == 'N':
+                packet.append('N{},{}'.format(*WIRE_RESET.unpack_from(payload, i)))
+                i += WIRE_RESET.size
+            elif opcode in 'HUOB':
+                count = 2
+                if opcode == 'B':
+                    count = payload[i]
+                    i += 1
+                packet.append(opcode + ','.join([WIRE_CARDS[card] for card in payload[i:i+count]]))
+                i += count
+            else:
+                packet.append(opcode)
+        return packet
+
+    def encode(self, action):
+        '''
+        Encodes an action in the engine's clause format.
+        '''
+        if isinstance(action, FoldAction):
+            return 'F'
+        if isinstance(action, CallAction):
+            return 'C'
+        if isinstance(action, CheckAction):
+            return 'K'
+        # isinstance(action, RaiseAction)
+        return 'R' + str(action.amount)
+
+    def send_clauses(self, clauses):
+        '''
+        Sends response clauses to the engine in the negotiated protocol.
+        '''
+        if self.binary:
+            payload = b''.join([clause[0].encode() + WIRE_ARGUMENTS[clause[0]].pack(int(clause[1:]))
+                                if clause[0] in WIRE_ARGUMENTS else clause.encode() for clause in clauses])
+            self.socketfile.buffer.write(WIRE_LENGTH.pack(len(payload)) + payload)
+            self.socketfile.buffer.flush()
+        else:
+            self.socketfile.write(' '.join(clauses) + '\n')
+            self.socketfile.flush()
+
     def send(self, action):
         '''
         Encodes an action and sends it to the engine.
         '''
-        if isinstance(action, FoldAction):
-            code = 'F'
-        elif isinstance(action, CallAction):
-            code = 'C'
-        elif isinstance(action, CheckAction):
-            code = 'K'
-        else:  # isinstance(action, RaiseAction)
-            code = 'R' + str(action.amount)
-        self.socketfile.write(code + '\n')
-        self.socketfile.flush()
+        self.send_clauses([self.encode(action)])
+
+    def encode_tables(self, actions):
+        '''
+        Encodes the actions for several tables, each tagged with I<table>.
+        '''
+        clauses = []
+        for table, action in actions.items():
+            clauses.append('I' + str(table))
+            clauses.append(self.encode(action))
+        return clauses
+
+    def handle(self, packet):
+        '''
+        Advances the game tree with one message from the engine.
+        Returns the response to send, or None once the game is over.
+        '''
+        if not self.update(packet):
+            return None
+        if self.round_flag:  # ack the engine
+            return CheckAction()
+        assert self.active == self.round_state.button % 2
+        return self.pokerbot.get_action(self.game_state, self.round_state, self.active)
+
+    def accepts_tables(self, tables):
+        '''
+        Returns True if the pokerbot can play that many tables on this connection.
+        '''
+        return tables == 1 or self.pokerbot.MULTI_TABLE
+
+    def handle_tables(self, packet):
+        '''
+        Advances the game tree of every table in a message whose clauses are tagged with I<table>,
+        then asks the pokerbot for all pending decisions at once.
+        Returns the responses by table.
+        '''
+        segments = {}
+        for clause in packet:
+            if clause[0] == 'I':
+                segment = segments.setdefault(int(clause[1:]), [])
+            else:
+                segment.append(clause)
+        actions = {}
+        decisions = {}
+        for table, segment in segments.items():
+            if table not in self.tables:
+                self.tables[table] = Runner(self.pokerbot, None)
+            runner = self.tables[table]
+            runner.update(segment)
+            if runner.round_flag:  # ack the engine
+                actions[table] = CheckAction()
+            else:
+                assert runner.active == runner.round_state.button % 2
+                decisions[table] = (runner.game_state, runner.round_state, runner.active)
+        if decisions:
+            actions.update(self.pokerbot.get_actions(decisions))
+        return {table: actions[table] for table in segments}
+
+    def update(self, packet):
+        '''
+        Applies the clauses of one message to the game tree.
+        Returns False once the game is over.
+        '''
+        game_state = self.game_state
+        round_state = self.round_state
+        active = self.active
+        for clause in packet:
+            if clause[0] == 'T':
+                game_state = GameState(game_state.bankroll, float(clause[1:]), game_state.round_num)
+            elif clause[0] == 'P':
+                active = int(clause[1:])
+            elif clause[0] == 'H':
+                hands = [[], []]
+                hands[active] = clause[1:].split(',')
+                pips = [SMALL_BLIND, BIG_BLIND]
+                stacks = [STARTING_STACK - SMALL_BLIND, STARTING_STACK - BIG_BLIND]
+                round_state = RoundState(0, 0, pips, stacks, hands, [], None)
+                if self.round_flag:
+                    self.pokerbot.handle_new_round(game_state, round_state, active)
+                    self.round_flag = False
+            elif clause[0] == 'U':
+                hands = [[], []]
+                hands[active] = clause[1:].split(',')
+                round_state = RoundState(round_state.button, round_state.street, round_state.pips, round_state.stacks,
+                                         hands, round_state.deck, round_state.previous_state)
+            elif clause[0] == 'F':
+                round_state = round_state.proceed(FoldAction())
+            elif clause[0] == 'C':
+                round_state = round_state.proceed(CallAction())
+            elif clause[0] == 'K':
+                round_state = round_state.proceed(CheckAction())
+            elif clause[0] == 'R':
+                round_state = round_state.proceed(RaiseAction(int(clause[1:])))
+            elif clause[0] == 'B':
+                round_state = RoundState(round_state.button, round_state.street, round_state.pips, round_state.stacks,
+                                         round_state.hands, clause[1:].split(','), round_state.previous_state)
+            elif clause[0] == 'O':
+                # backtrack
+                round_state = round_state.previous_state
+                revised_hands = list(round_state.hands)
+                revised_hands[1-active] = clause[1:].split(',')
+                # rebuild history
+                round_state = RoundState(round_state.button, round_state.street, round_state.pips, round_state.stacks,
+                                         revised_hands, round_state.deck, round_state.previous_state)
+                round_state = TerminalState([0, 0], round_state)
+            elif clause[0] == 'D':
+                assert isinstance(round_state, TerminalState)
+                delta = int(clause[1:])
+                deltas = [-delta, -delta]
+                deltas[active] = delta
+                round_state = TerminalState(deltas, round_state.previous_state)
+                game_state = GameState(game_state.bankroll + delta, game_state.game_clock, game_state.round_num)
+                self.pokerbot.handle_round_over(game_state, round_state, active)
+                game_state = GameState(game_state.bankroll, game_state.game_clock, game_state.round_num + 1)
+                self.round_flag = True
+            elif clause[0] == 'N':
+                # a resumed game says which round it restarts at and with what bankroll
+                round_num, bankroll = map(int, clause[1:].split(',')) if len(clause) > 1 else (1, 0)
+                game_state = GameState(bankroll, 0., round_num)
+                round_state = None
+                self.round_flag = True
+                self.pokerbot.handle_new_game()
+            elif clause[0] == 'Q':
+                return False
+        self.game_state = game_state
+        self.round_state = round_state
+        self.active = active
+        return True
 
     def run(self):
         '''
         Reconstructs the game tree based on the action history received from the engine.
         '''
-        game_state = GameState(0, 0., 1)
-        round_state = None
-        active = 0
-        round_flag = True
         for packet in self.receive():
-            for clause in packet:
-                if clause[0] == 'T':
-                    game_state = GameState(game_state.bankroll, float(clause[1:]), game_state.round_num)
-                elif clause[0] == 'P':
-                    active = int(clause[1:])
-                elif clause[0] == 'H':
-                    hands = [[], []]
-                    hands[active] = clause[1:].split(',')
-                    pips = [SMALL_BLIND, BIG_BLIND]
-                    stacks = [STARTING_STACK - SMALL_BLIND, STARTING_STACK - BIG_BLIND]
-                    round_state = RoundState(0, 0, pips, stacks, hands, [], None)
-                    if round_flag:
-                        self.pokerbot.handle_new_round(game_state, round_state, active)
-                        round_flag = False
-                elif clause[0] == 'U':
-                    hands = [[], []]
-                    hands[active] = clause[1:].split(',')
-                    round_state = RoundState(round_state.button, round_state.street, round_state.pips, round_state.stacks,
-                                             hands, round_state.deck, round_state.previous_state)
-                elif clause[0] == 'F':
-                    round_state = round_state.proceed(FoldAction())
-                elif clause[0] == 'C':
-                    round_state = round_state.proceed(CallAction())
-                elif clause[0] == 'K':
-                    round_state = round_state.proceed(CheckAction())
-                elif clause[0] == 'R':
-                    round_state = round_state.proceed(RaiseAction(int(clause[1:])))
-                elif clause[0] == 'B':
-                    round_state = RoundState(round_state.button, round_state.street, round_state.pips, round_state.stacks,
-                                             round_state.hands, clause[1:].split(','), round_state.previous_state)
-                elif clause[0] == 'O':
-                    # backtrack
-                    round_state = round_state.previous_state
-                    revised_hands = list(round_state.hands)
-                    revised_hands[1-active] = clause[1:].split(',')
-                    # rebuild history
-                    round_state = RoundState(round_state.button, round_state.street, round_state.pips, round_state.stacks,
-                                             revised_hands, round_state.deck, round_state.previous_state)
-                    round_state = TerminalState([0, 0], round_state)
-                elif clause[0] == 'D':
-                    assert isinstance(round_state, TerminalState)
-                    delta = int(clause[1:])
-                    deltas = [-delta, -delta]
-                    deltas[active] = delta
-                    round_state = TerminalState(deltas, round_state.previous_state)
-                    game_state = GameState(game_state.bankroll + delta, game_state.game_clock, game_state.round_num)
-                    self.pokerbot.handle_round_over(game_state, round_state, active)
-                    game_state = GameState(game_state.bankroll, game_state.game_clock, game_state.round_num + 1)
-                    round_flag = True
-                elif clause[0] == 'Q':
-                    return
-            if round_flag:  # ack the engine
-                self.send(CheckAction())
-            else:
-                assert active == round_state.button % 2
-                action = self.pokerbot.get_action(game_state, round_state, active)
-                self.send(action)
+            if packet[0] == WIRE_VERSION:  # the engine offers the binary protocol
+                self.socketfile.write(WIRE_VERSION + '\n')
+                self.socketfile.flush()
+                self.binary = True
+                continue
+            if packet[0][0] == 'M':  # the engine offers to play several tables on this connection
+                tables = int(packet[0][1:])
+                self.socketfile.write(('M' + str(tables) if self.accepts_tables(tables) else 'M1') + '\n')
+                self.socketfile.flush()
+                continue
+            if packet[0][0] == 'I':
+                self.send_clauses(self.encode_tables(self.handle_tables(packet)))
+                continue
+            action = self.handle(packet)
+            if action is None:
+                return
+            self.send(action)
+            if isinstance(self.round_state, (RoundState, TerminalState)):  # None after a new game starts
+                self.work = self.pokerbot.precompute(self.game_state, self.round_state, self.active)
 
 
 def parse_args():
@@ -117,8 +283,13 @@ def parse_args():
     '''
     parser = argparse.ArgumentParser(prog='python3 player.py')
     parser.add_argument('--host', type=str, default='localhost', help='Host to connect to, defaults to localhost')
-    parser.add_argument('port', type=int, help='Port on host to connect to')
-    return parser.parse_args()
+    parser.add_argument('--unix', type=str, default=None, help='Unix domain socket path to connect to instead of a port')
+    parser.add_argument('--fd', type=int, default=None, help='Inherited socket file descriptor to use instead of a port')
+    parser.add_argument('port', type=int, nargs='?', help='Port on host to connect to')
+    args = parser.parse_args()
+    if args.port is None and args.unix is None and args.fd is None:
+        parser.error('one of port, --unix or --fd is required')
+    return args
 
 def run_bot(pokerbot, args):
     '''
@@ -126,12 +297,23 @@ def run_bot(pokerbot, args):
     '''
     assert isinstance(pokerbot, Bot)
     try:
-        sock = socket.create_connection((args.host, args.port))
+        if args.fd is not None:
+            sock = socket.socket(fileno=args.fd)
+        elif args.unix is not None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(args.unix)
+        else:
+            sock = socket.create_connection((args.host, args.port))
     except OSError:
-        print('Could not connect to {}:{}'.format(args.host, args.port))
+        if args.fd is not None:
+            print('Could not use socket fd {}'.format(args.fd))
+        elif args.unix is not None:
+            print('Could not connect to {}'.format(args.unix))
+        else:
+            print('Could not connect to {}:{}'.format(args.host, args.port))
         return
     socketfile = sock.makefile('rw')
-    runner = Runner(pokerbot, socketfile)
+    runner = Runner(pokerbot, socketfile, sock)
     runner.run()
     socketfile.close()
     sock.close()
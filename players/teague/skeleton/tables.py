@@ -0,0 +1,74 @@
+'''
+Start-up friendly loading for the pokerbots: precompiled tables that are memory-mapped on first use
+instead of parsed from JSON.
+
+Compile a preflop table from the JSON that stat_bot reads:
+python3 skeleton/tables.py data/preflop_ev.json data/preflop_ev.bin
+'''
+import array
+import json
+import mmap
+import os
+import sys
+
+RANKS = '23456789TJQKA'
+# the 169 preflop hand classes, named higher rank first with pairs as offsuit, e.g. 'AKs', 'AKo', 'AAo'
+HAND_CLASSES = [high + low + suit for i, high in enumerate(RANKS[::-1]) for low in RANKS[::-1][i:]
+                for suit in ('so' if high != low else 'o')]
+
+
+class Table():
+    '''
+    A flat table of doubles in a binary file, memory-mapped the first time it is read.
+    Index it by position, or by name if it was given the names of its entries.
+    '''
+
+    def __init__(self, path, names=None):
+        self.path = os.path.abspath(path)  # resolved now, in-process bots only run in their directory while loading
+        self.index = None if names is None else {name: i for i, name in enumerate(names)}
+        self.values = None
+
+    def load(self):
+        '''
+        Maps the file into memory. The pages are only read as they are touched.
+        '''
+        with open(self.path, 'rb') as table_file:
+            self.values = memoryview(mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)).cast('d')
+
+    def __getitem__(self, key):
+        if self.values is None:
+            self.load()
+        return self.values[key if self.index is None else self.index[key]]
+
+    def __len__(self):
+        if self.values is None:
+            self.load()
+        return len(self.values)
+
+
+def write_table(path, values):
+    '''
+    Writes values as a table file of native doubles.
+    '''
+    with open(path, 'wb') as table_file:
+        array.array('d', values).tofile(table_file)
+
+
+def preflop_table(path):
+    '''
+    Returns the preflop table at path, indexed by hand class name.
+    '''
+    return Table(path, HAND_CLASSES)
+
+
+def compile_preflop(json_path, table_path):
+    '''
+    Converts a JSON object of values by hand class name into a preflop table.
+    '''
+    with open(json_path) as json_file:
+        values = json.load(json_file)
+    write_table(table_path, [values[name] for name in HAND_CLASSES])
+
+
+if __name__ == '__main__':
+    compile_preflop(sys.argv[1], sys.argv[2])
@@ -0,0 +1,116 @@
+'''
+Runs a grid of engine config overrides and pokerbot pairings on a process pool, without editing config.py.
+
+Every run gets a fresh worker process whose engine globals are overridden in place, so runs with different
+settings never see each other's config. Note that the bots keep their own copies of the game constants in
+skeleton/states.py, so sweeping STARTING_STACK or the blinds changes the engine's rules but not the bots' view.
+'''
+import argparse
+import ast
+import itertools
+import json
+import os
+
+import config
+from tournament import run_matches
+
+
+def parse_setting(setting):
+    '''
+    Parses one KEY=VALUE,VALUE,... option into the key and its list of values.
+    Values are Python literals, anything else is taken as a string.
+    '''
+    key, _, values = setting.partition('=')
+    parsed = []
+    for value in values.split(','):
+        try:
+            parsed.append(ast.literal_eval(value))
+        except (ValueError, SyntaxError):
+            parsed.append(value)
+    return key, parsed
+
+
+def player_names(path_1, path_2):
+    '''
+    Names the players of a run after their directories, keeping the names distinct.
+    '''
+    name_1, name_2 = os.path.basename(path_1), os.path.basename(path_2)
+    if name_1 == name_2:
+        return name_1 + '_1', name_2 + '_2'
+    return name_1, name_2
+
+
+def schedule(grid, pairs, log_directory):
+    '''
+    Crosses every combination of the grid's values with every pairing.
+    Returns the runs' settings and their config overrides, each run logging under its own directory.
+    '''
+    keys = list(grid)
+    runs = []
+    for values in itertools.product(*(grid[key] for key in keys)):
+        for path_1, path_2 in pairs:
+            settings = dict(zip(keys, values))
+            match = dict(settings)
+            match['PLAYER_1_NAME'], match['PLAYER_2_NAME'] = player_names(path_1, path_2)
+            match['PLAYER_1_PATH'], match['PLAYER_2_PATH'] = path_1, path_2
+            match['GAME_LOG_FILENAME'] = os.path.join(log_directory, 'run_' + str(len(runs) + 1), 'gamelog')
+            runs.append((settings, match))
+    return runs
+
+
+def format_table(keys, runs, results):
+    '''
+    Renders one row per run: its settings, the pairing and player 1's bankroll.
+    '''
+    header = ['run'] + keys + ['player_1', 'player_2', 'bankroll_1']
+    rows = []
+    for run_num, ((settings, match), bankrolls) in enumerate(zip(runs, results), 1):
+        rows.append([str(run_num)] + [str(settings[key]) for key in keys] +
+                    [match['PLAYER_1_NAME'], match['PLAYER_2_NAME'], str(bankrolls[match['PLAYER_1_NAME']])])
+    widths = [max(len(row[i]) for row in [header] + rows) + 2 for i in range(len(header))]
+    return '\n'.join(''.join(cell.rjust(width) for cell, width in zip(row, widths)) for row in [header] + rows)
+
+
+def parse_args():
+    '''
+    Parses the sweep options.
+    '''
+    parser = argparse.ArgumentParser(prog='python3 sweep.py')
+    parser.add_argument('--set', type=str, action='append', default=[], metavar='KEY=VALUE,VALUE',
+                        help='Config values to sweep, e.g. --set FLOP_PERCENT=0.1,0.2 (repeatable)')
+    parser.add_argument('--pair', type=str, nargs=2, action='append', metavar=('PATH_1', 'PATH_2'),
+                        help='Pokerbots to play against each other (repeatable), defaults to the pair in config.py')
+    parser.add_argument('--logs', type=str, default='./sweep', help='Directory for run logs, defaults to ./sweep')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='Worker processes, defaults to the core count')
+    args = parser.parse_args()
+    args.grid = dict(parse_setting(setting) for setting in args.set)
+    for key in args.grid:
+        if not key.isupper() or not hasattr(config, key):
+            parser.error('unknown config value ' + key)
+        if key.startswith('PLAYER_') or key == 'GAME_LOG_FILENAME':
+            parser.error(key + ' is set per run, use --pair and --logs instead')
+    if args.pair is None:
+        args.pair = [(config.PLAYER_1_PATH, config.PLAYER_2_PATH)]
+    return args
+
+
+def main():
+    '''
+    Runs the sweep and writes the results table and JSON next to the run logs.
+    '''
+    args = parse_args()
+    runs = schedule(args.grid, args.pair, args.logs)
+    print('Running', len(runs), 'configurations on', args.processes, 'processes')
+    results = run_matches([match for _, match in runs], args.processes)
+    table = format_table(list(args.grid), runs, results)
+    print(table)
+    with open(os.path.join(args.logs, 'results.txt'), 'w') as table_file:
+        table_file.write(table + '\n')
+    with open(os.path.join(args.logs, 'results.json'), 'w') as results_file:
+        json.dump([{'settings': settings, 'player_1': match['PLAYER_1_PATH'], 'player_2': match['PLAYER_2_PATH'],
+                    'bankrolls': bankrolls, 'log': match['GAME_LOG_FILENAME']}
+                   for (settings, match), bankrolls in zip(runs, results)], results_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
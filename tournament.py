@@ -0,0 +1,141 @@
+'''
+Runs a round-robin tournament between every pokerbot under players/ on a process pool.
+'''
+import argparse
+import contextlib
+import itertools
+import json
+import multiprocessing
+import os
+
+
+def find_bots(directory):
+    '''
+    Returns the names of the pokerbots in directory, i.e. the subdirectories with a commands.json.
+    '''
+    return sorted(name for name in os.listdir(directory)
+                  if os.path.isfile(os.path.join(directory, name, 'commands.json')))
+
+
+def schedule(bots, players_directory, log_directory, overrides=None):
+    '''
+    Pairs every bot with every other bot in both seats.
+    Each match gets its own game log and player logs under log_directory.
+    '''
+    matches = []
+    for bot_1, bot_2 in itertools.permutations(bots, 2):
+        match = dict(overrides or {})
+        match.update({
+            'PLAYER_1_NAME': bot_1,
+            'PLAYER_1_PATH': os.path.join(players_directory, bot_1),
+            'PLAYER_2_NAME': bot_2,
+            'PLAYER_2_PATH': os.path.join(players_directory, bot_2),
+            'GAME_LOG_FILENAME': os.path.join(log_directory, bot_1 + '_vs_' + bot_2, 'gamelog'),
+        })
+        matches.append(match)
+    return matches
+
+
+def run_match(overrides):
+    '''
+    Plays one match with the given config overrides and returns the final bankrolls by player name.
+    Meant to run in a fresh worker process, so the overrides never leak into another match.
+    '''
+    import engine
+    vars(engine).update(overrides)
+    os.makedirs(os.path.dirname(engine.GAME_LOG_FILENAME), exist_ok=True)
+    with open(engine.GAME_LOG_FILENAME + '_engine.txt', 'w') as engine_output:
+        with contextlib.redirect_stdout(engine_output):
+            if engine.NUM_GAMES > 1:
+                results = engine.run_batch(engine.NUM_GAMES)
+                return {name: sum(bankrolls[name] for bankrolls in results) for name in results[0]}
+            return engine.Game().run()
+
+
+def run_matches(matches, processes):
+    '''
+    Runs matches on a process pool and returns their results in the same order.
+    '''
+    # one match per worker process keeps every match's engine globals isolated
+    with multiprocessing.Pool(processes, maxtasksperchild=1) as pool:
+        return pool.map(run_match, matches, chunksize=1)
+
+
+def bankroll_matrix(bots, results):
+    '''
+    Sums each bot's bankroll against each opponent over all of their matches.
+    '''
+    matrix = {bot: {opponent: 0 for opponent in bots if opponent != bot} for bot in bots}
+    for bankrolls in results:
+        (bot_1, bankroll_1), (bot_2, bankroll_2) = bankrolls.items()
+        matrix[bot_1][bot_2] += bankroll_1
+        matrix[bot_2][bot_1] += bankroll_2
+    return matrix
+
+
+def format_matrix(bots, matrix):
+    '''
+    Renders the bankroll matrix as a table, one row per bot, sorted by total bankroll.
+    '''
+    width = max(len(bot) for bot in bots) + 2
+    ranking = sorted(bots, key=lambda bot: sum(matrix[bot].values()), reverse=True)
+    lines = [''.ljust(width) + ''.join(bot.rjust(width) for bot in ranking) + 'Total'.rjust(width)]
+    for bot in ranking:
+        cells = ['-' if opponent == bot else str(matrix[bot][opponent]) for opponent in ranking]
+        lines.append(bot.ljust(width) + ''.join(cell.rjust(width) for cell in cells) +
+                     str(sum(matrix[bot].values())).rjust(width))
+    return '\n'.join(lines)
+
+
+def parse_args():
+    '''
+    Parses the tournament options.
+    '''
+    parser = argparse.ArgumentParser(prog='python3 tournament.py')
+    parser.add_argument('--players', type=str, default='./players', help='Directory of pokerbots, defaults to ./players')
+    parser.add_argument('--logs', type=str, default='./tournament', help='Directory for match logs, defaults to ./tournament')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='Worker processes, defaults to the core count')
+    parser.add_argument('--rounds', type=int, help='Overrides NUM_ROUNDS for every match')
+    parser.add_argument('--games', type=int, help='Overrides NUM_GAMES, the games per match played on the same bot processes')
+    parser.add_argument('--early-stop', action='store_true', help='Ends each match once its winner is decided')
+    parser.add_argument('--in-process', action='store_true', help='Plays the bots inside the engine process')
+    parser.add_argument('--asyncio', type=int, metavar='N',
+                        help='Plays up to N matches at once on one event loop instead of the process pool')
+    args = parser.parse_args()
+    if args.asyncio is not None and args.in_process:
+        parser.error('--asyncio needs bot processes, it cannot be combined with --in-process')
+    return args
+
+
+def main():
+    '''
+    Runs the tournament and writes the bankroll matrix next to the match logs.
+    '''
+    args = parse_args()
+    overrides = {}
+    if args.rounds is not None:
+        overrides['NUM_ROUNDS'] = args.rounds
+    if args.games is not None:
+        overrides['NUM_GAMES'] = args.games
+    if args.early_stop:
+        overrides['EARLY_STOP'] = True
+    if args.in_process:
+        overrides['IN_PROCESS'] = True
+    bots = find_bots(args.players)
+    matches = schedule(bots, args.players, args.logs, overrides)
+    if args.asyncio is not None:
+        print('Running', len(matches), 'matches between', len(bots), 'bots,', args.asyncio, 'at a time')
+        import async_engine
+        vars(async_engine.engine).update(overrides)
+        results = async_engine.run_matches(matches, args.asyncio)
+    else:
+        print('Running', len(matches), 'matches between', len(bots), 'bots on', args.processes, 'processes')
+        results = run_matches(matches, args.processes)
+    matrix = bankroll_matrix(bots, results)
+    print(format_matrix(bots, matrix))
+    with open(os.path.join(args.logs, 'results.json'), 'w') as results_file:
+        json.dump({'matches': results, 'matrix': matrix}, results_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+'''
+Vectorized NumPy simulator that plays thousands of independent rounds at once under the engine's rules,
+swaps included, for tuning rule-based strategies without the socket engine.
+
+A policy is a function policy(observation, rng) returning (actions, amounts): arrays of FOLD, CALL, CHECK
+or RAISE and the raise-to amounts, one per row of the Observation. Illegal actions are replaced by a check
+or fold, as the engine does.
+'''
+from collections import namedtuple
+import argparse
+import time
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.getcwd())
+from config import *
+from compact_state import FOLD, CALL, CHECK, RAISE, DEAL_DEPTH
+
+# One row per decision, seen by the player to act. Cards are codes 13 * suit + rank, -1 if not dealt.
+# rows and player say which round and seat each row is, and deal is the whole batch's dealt cards.
+Observation = namedtuple('Observation', ['street', 'hand', 'board', 'my_pip', 'opp_pip', 'my_stack', 'opp_stack',
+                                         'continue_cost', 'pot', 'legal', 'min_raise', 'max_raise',
+                                         'rows', 'player', 'deal'])
+
+# lookup tables over 13-bit rank masks
+RANK_BITS = 1 << np.arange(13)
+MASK_BITS = (np.arange(1 << 13)[:, None] >> np.arange(13)) & 1
+POPCOUNT = MASK_BITS.sum(axis=1)
+HIGHEST = np.where(POPCOUNT > 0, 12 - np.argmax(MASK_BITS[:, ::-1], axis=1), -1)
+# TOP[k][mask] keeps the k highest ranks of mask, which compares as kickers do
+TOP = [(MASK_BITS * (np.cumsum(MASK_BITS[:, ::-1], axis=1)[:, ::-1] <= k)) @ RANK_BITS for k in range(6)]
+
+
+def straight_highs():
+    '''
+    Returns the high rank of the best straight in each rank mask, -1 if there is none.
+    '''
+    highs = np.full(1 << 13, -1)
+    for high in range(3, 13):
+        window = MASK_BITS[:, high-4:high+1].all(axis=1) if high > 3 else \
+            MASK_BITS[:, [12, 0, 1, 2, 3]].all(axis=1)  # the wheel, A-2-3-4-5
+        highs[window] = high
+    return highs
+
+
+STRAIGHT_HIGH = straight_highs()
+
+
+def evaluate(cards):
+    '''
+    Scores 7-card hands given as an integer array (..., 7) of card codes.
+    Higher scores win, and equal scores split, as with eval7.evaluate.
+    '''
+    shape = cards.shape[:-1]
+    cards = cards.reshape(-1, cards.shape[-1])
+    ranks = cards % 13
+    suits = cards // 13
+    # counting with bincount over row-offset codes is much cheaper than summing one-hot arrays
+    rows = np.arange(len(cards))[:, None]
+    counts = np.bincount((13 * rows + ranks).ravel(), minlength=13 * len(cards)).reshape(-1, 13)
+    rank_mask = (counts > 0) @ RANK_BITS
+    quads = (counts == 4) @ RANK_BITS
+    trips = (counts == 3) @ RANK_BITS
+    pairs = (counts == 2) @ RANK_BITS
+    singles = (counts == 1) @ RANK_BITS
+    suit_counts = np.bincount((4 * rows + suits).ravel(), minlength=4 * len(cards)).reshape(-1, 4)
+    flush_suit = np.argmax(suit_counts, axis=1)
+    has_flush = suit_counts.max(axis=1) >= 5
+    flush_mask = ((suits == flush_suit[:, None]) * RANK_BITS[ranks]).sum(axis=1)
+    straight_flush = STRAIGHT_HIGH[flush_mask]
+    straight = STRAIGHT_HIGH[rank_mask]
+    trip_rank = HIGHEST[trips]
+    # a second set of trips plays as the pair of a full house
+    full_house_pair = HIGHEST[np.where(trip_rank >= 0, trips & ~(1 << np.maximum(trip_rank, 0)), 0) | pairs]
+    top_pairs = TOP[2][pairs]
+    categories = [
+        (has_flush & (straight_flush >= 0), straight_flush),
+        (quads > 0, (HIGHEST[quads] << 13) | TOP[1][rank_mask & ~quads]),
+        ((trips > 0) & (full_house_pair >= 0), (trip_rank << 4) | full_house_pair),
+        (has_flush, TOP[5][flush_mask]),
+        (straight >= 0, straight),
+        (trips > 0, (trip_rank << 13) | TOP[2][singles]),
+        (POPCOUNT[pairs] >= 2, (top_pairs << 4) | HIGHEST[rank_mask & ~top_pairs]),
+        (pairs > 0, (HIGHEST[pairs] << 13) | TOP[3][singles]),
+    ]
+    scores = TOP[5][rank_mask]
+    for category, (condition, tiebreak) in zip(range(8, 0, -1), categories):
+        scores = np.where(condition & (scores < (1 << 20)), (category << 20) | tiebreak, scores)
+    return scores.reshape(shape)
+
+
+def estimate_strength(hands, boards, iters, rng, chunk_size=50000):
+    '''
+    Monte Carlo win probability (ties count half) of each row's two hole cards against a random hand,
+    completing the board at random. hands is (n, 2) and boards (n, 5) with -1 for cards not yet dealt.
+    '''
+    n = len(hands)
+    strengths = np.empty(n)
+    rows_per_chunk = max(1, chunk_size // iters)
+    for start in range(0, n, rows_per_chunk):
+        hand = hands[start:start + rows_per_chunk]
+        board = boards[start:start + rows_per_chunk]
+        rows = len(hand)
+        known = np.concatenate([hand, board], axis=1)
+        seen = np.zeros((rows, 52), bool)
+        rows_index = np.repeat(np.arange(rows), known.shape[1])
+        valid = known.reshape(-1) >= 0
+        seen[rows_index[valid], known.reshape(-1)[valid]] = True
+        # each row's unseen cards come first, and only as many are drawn as the samples need
+        unseen = np.argsort(seen, axis=1, kind='stable')
+        num_unseen = 52 - seen.sum(axis=1, keepdims=True)
+        missing = np.broadcast_to(board[:, None, :] < 0, (rows, iters, 5))
+        positions = draw_positions(num_unseen, iters, 2 + missing.sum(axis=2).max(), rng)
+        draws = unseen[np.arange(rows)[:, None, None], positions]
+        full_board = np.broadcast_to(board[:, None, :], (rows, iters, 5)).copy()
+        # fill each sample's missing board cards, then give the opponent the next two
+        fill_order = np.cumsum(missing, axis=2) - 1
+        full_board[missing] = np.take_along_axis(draws, np.maximum(fill_order, 0), axis=2)[missing]
+        num_missing = missing.sum(axis=2, keepdims=True)
+        opponent = np.take_along_axis(draws, num_missing + np.arange(2), axis=2)
+        mine = evaluate(np.concatenate([np.broadcast_to(hand[:, None, :], (rows, iters, 2)), full_board], axis=2))
+        theirs = evaluate(np.concatenate([opponent, full_board], axis=2))
+        strengths[start:start + rows] = ((mine > theirs) + 0.5 * (mine == theirs)).mean(axis=1)
+    return strengths
+
+
+def draw_positions(num_unseen, iters, count, rng):
+    '''
+    Draws count distinct positions below num_unseen (rows, 1) for each of iters samples per row,
+    a uniformly random ordered draw without replacement, as the first count cards of a shuffle would be.
+    '''
+    positions = np.empty((len(num_unseen), iters, count), int)
+    for i in range(count):
+        position = (rng.random((len(num_unseen), iters)) * (num_unseen - i)).astype(int)
+        # step over the positions already drawn, lowest first, to land on the position-th free one
+        for taken in np.sort(positions[:, :, :i], axis=2).transpose(2, 0, 1):
+            position += position >= taken
+        positions[:, :, i] = position
+    return positions
+
+
+class StrengthCache():
+    '''
+    Monte Carlo strengths by round, player and street. A player's cards on a street are fixed by the deal,
+    swaps included, so every decision on them can share one estimate: re-raises on the same street, and
+    every policy of a sweep played on the same deals (BatchRounds from the same seed).
+    '''
+
+    def __init__(self, iters=50):
+        self.iters = iters
+        self.deal = None
+        self.strengths = None
+
+    def lookup(self, observation, rng):
+        '''
+        Returns the strength for each row of the Observation, estimating only those not seen before.
+        '''
+        if self.deal is not observation.deal and not np.array_equal(self.deal, observation.deal):
+            self.deal = observation.deal
+            self.strengths = np.full((len(observation.deal), 2, 4), np.nan)
+        key = (observation.rows, observation.player, np.maximum(observation.street - 2, 0))
+        strengths = self.strengths[key]
+        unknown = np.isnan(strengths)
+        if unknown.any():
+            strengths[unknown] = estimate_strength(observation.hand[unknown], observation.board[unknown], self.iters, rng)
+            self.strengths[tuple(index[unknown] for index in key)] = strengths[unknown]
+        return strengths
+
+
+class BatchRounds():
+    '''
+    The state of n independent rounds, each row following RoundState's rules.
+    hands holds player 0's two cards, then player 1's.
+    '''
+
+    def __init__(self, n, rng):
+        self.n = n
+        self.deck = np.argsort(rng.random((n, 52)), axis=1)[:, :DEAL_DEPTH]
+        self.swap_rolls = rng.random((n, 8))  # flop swaps, then turn swaps
+        self.hands = self.deck[:, :4].copy()
+        self.top = np.full(n, 4)
+        self.board = np.full((n, 5), -1)
+        self.button = np.zeros(n, int)
+        self.street = np.zeros(n, int)
+        self.pips = np.tile([SMALL_BLIND, BIG_BLIND], (n, 1))
+        self.stacks = np.tile([STARTING_STACK - SMALL_BLIND, STARTING_STACK - BIG_BLIND], (n, 1))
+        self.live = np.ones(n, bool)
+        self.deltas = np.zeros(n, int)  # player 0's
+
+    def legal_actions(self, rows, active):
+        '''
+        Returns the bitmask of legal actions and the raise bounds of the given rows.
+        '''
+        my_pip = self.pips[rows, active]
+        opp_pip = self.pips[rows, 1-active]
+        my_stack = self.stacks[rows, active]
+        opp_stack = self.stacks[rows, 1-active]
+        continue_cost = opp_pip - my_pip
+        bets_forbidden = (my_stack == 0) | (opp_stack == 0)
+        raises_forbidden = (continue_cost == my_stack) | (opp_stack == 0)
+        legal = np.where(continue_cost == 0, np.where(bets_forbidden, CHECK, CHECK | RAISE),
+                         np.where(raises_forbidden, FOLD | CALL, FOLD | CALL | RAISE))
+        max_contribution = np.minimum(my_stack, opp_stack + continue_cost)
+        min_contribution = np.minimum(max_contribution, continue_cost + np.maximum(continue_cost, BIG_BLIND))
+        return legal, my_pip + min_contribution, my_pip + max_contribution
+
+    def observe(self, rows, active):
+        '''
+        Builds the Observation of the given rows for their active players.
+        '''
+        legal, min_raise, max_raise = self.legal_actions(rows, active)
+        hand = np.stack([self.hands[rows, 2 * active], self.hands[rows, 2 * active + 1]], axis=1)
+        my_pip = self.pips[rows, active]
+        opp_pip = self.pips[rows, 1-active]
+        return Observation(self.street[rows], hand, self.board[rows], my_pip, opp_pip,
+                           self.stacks[rows, active], self.stacks[rows, 1-active], opp_pip - my_pip,
+                           2 * STARTING_STACK - self.stacks[rows].sum(axis=1), legal, min_raise, max_raise,
+                           rows, active, self.deck)
+
+    def proceed(self, rows, active, actions, amounts, legal, min_raise, max_raise):
+        '''
+        Applies one action in each of the given rows, like RoundState.proceed.
+        '''
+        allowed = (actions & legal).astype(bool) & np.isin(actions, (FOLD, CALL, CHECK, RAISE))
+        allowed &= (actions != RAISE) | ((min_raise <= amounts) & (amounts <= max_raise))
+        actions = np.where(allowed, actions, np.where(legal & CHECK, CHECK, FOLD))
+        button = self.button[rows]
+        street = self.street[rows]
+        folds = rows[actions == FOLD]
+        folders = active[actions == FOLD]
+        self.deltas[folds] = np.where(folders == 0, self.stacks[folds, 0] - STARTING_STACK,
+                                      STARTING_STACK - self.stacks[folds, 1])
+        self.live[folds] = False
+        # the small blind calling the big blind is the only call that does not close the betting
+        limp = (actions == CALL) & (button == 0)
+        limps = rows[limp]
+        self.pips[limps] = BIG_BLIND
+        self.stacks[limps] = STARTING_STACK - BIG_BLIND
+        calls = (actions == CALL) & (button > 0)
+        call_rows = rows[calls]
+        call_active = active[calls]
+        contribution = self.pips[call_rows, 1-call_active] - self.pips[call_rows, call_active]
+        self.stacks[call_rows, call_active] -= contribution
+        self.pips[call_rows, call_active] += contribution
+        checks = actions == CHECK
+        closing_checks = checks & (((street == 0) & (button > 0)) | (button > 1))
+        raises = actions == RAISE
+        raise_rows = rows[raises]
+        raise_active = active[raises]
+        self.stacks[raise_rows, raise_active] -= amounts[raises] - self.pips[raise_rows, raise_active]
+        self.pips[raise_rows, raise_active] = amounts[raises]
+        self.button[rows[limp | calls | (checks & ~closing_checks) | raises]] += 1
+        self.proceed_street(rows[calls | closing_checks])
+
+    def proceed_street(self, rows):
+        '''
+        Resets the pips and deals the next street of the given rows, or settles them after the river.
+        '''
+        street = self.street[rows]
+        self.showdown(rows[street == 5])
+        rows = rows[street < 5]
+        street = street[street < 5]
+        for swap_street, percent, offset in ((0, FLOP_PERCENT, 0), (3, TURN_PERCENT, 4)):
+            swapping = rows[street == swap_street]
+            for card in range(4):
+                swapped = swapping[self.swap_rolls[swapping, offset + card] < percent]
+                self.hands[swapped, card] = self.deck[swapped, self.top[swapped]]
+                self.top[swapped] += 1
+        flops = rows[street == 0]
+        self.board[flops, :3] = self.deck[flops[:, None], self.top[flops, None] + np.arange(3)]
+        self.top[flops] += 3
+        later = rows[street > 0]
+        self.board[later, self.street[later]] = self.deck[later, self.top[later]]
+        self.top[later] += 1
+        self.street[rows] = np.where(street == 0, 3, street + 1)
+        self.button[rows] = 1
+        self.pips[rows] = 0
+
+    def showdown(self, rows):
+        '''
+        Compares the hands of the given rows and settles their pots.
+        '''
+        board = self.board[rows]
+        score0 = evaluate(np.concatenate([self.hands[rows, :2], board], axis=1))
+        score1 = evaluate(np.concatenate([self.hands[rows, 2:], board], axis=1))
+        stacks = self.stacks[rows]
+        self.deltas[rows] = np.where(score0 > score1, STARTING_STACK - stacks[:, 1],
+                                     np.where(score0 < score1, stacks[:, 0] - STARTING_STACK,
+                                              (stacks[:, 0] - stacks[:, 1]) // 2))
+        self.live[rows] = False
+
+
+def simulate(policy_a, policy_b, num_rounds, rng):
+    '''
+    Plays num_rounds independent rounds between two policies, alternating the button like the engine.
+    Returns policy_a's delta in every round.
+    '''
+    return play_rounds(BatchRounds(num_rounds, rng), policy_a, policy_b, rng)
+
+
+def play_rounds(rounds, policy_a, policy_b, rng):
+    '''
+    Plays dealt BatchRounds to the end, with policy_a as player 0 in even rows and player 1 in odd rows.
+    Returns policy_a's delta in every round.
+    '''
+    seat_a = np.arange(rounds.n) % 2  # player 0 posts the small blind, as in the engine
+    while rounds.live.any():
+        rows = np.nonzero(rounds.live)[0]
+        active = rounds.button[rows] % 2
+        legal, min_raise, max_raise = rounds.legal_actions(rows, active)
+        actions = np.empty(len(rows), int)
+        amounts = np.zeros(len(rows), int)
+        for policy, turn in ((policy_a, active == seat_a[rows]), (policy_b, active != seat_a[rows])):
+            if turn.any():
+                actions[turn], amounts[turn] = policy(rounds.observe(rows[turn], active[turn]), rng)
+        rounds.proceed(rows, active, actions, amounts, legal, min_raise, max_raise)
+    return np.where(seat_a == 0, rounds.deltas, -rounds.deltas)
+
+
+def fold_policy(observation, rng):
+    '''
+    fold_bot: folds whenever it can, otherwise checks.
+    '''
+    return np.where(observation.legal & FOLD, FOLD, CHECK), np.zeros(len(observation.legal), int)
+
+
+def check_call_policy(observation, rng):
+    '''
+    Checks or calls every street.
+    '''
+    return np.where(observation.legal & CHECK, CHECK, CALL), np.zeros(len(observation.legal), int)
+
+
+def make_threshold_policy(raise_strength, call_margin=0., pot_fraction=0.75, iters=50, strengths=None):
+    '''
+    A lec2-style policy: Monte Carlo strength against the pot odds. It calls when strength beats the pot
+    odds by call_margin, raises pot_fraction of the pot when strength is at least raise_strength and
+    otherwise checks or folds. Pass one StrengthCache to several policies to share their estimates.
+    '''
+    if strengths is None:
+        strengths = StrengthCache(iters)
+
+    def policy(observation, rng):
+        strength = strengths.lookup(observation, rng)
+        cost = observation.continue_cost
+        pot_odds = cost / (observation.pot + cost)
+        raise_to = observation.my_pip + cost + (pot_fraction * (observation.pot + cost)).astype(int)
+        amounts = np.clip(raise_to, observation.min_raise, observation.max_raise)
+        actions = np.where(cost > 0, np.where(strength >= pot_odds + call_margin, CALL, FOLD), CHECK)
+        actions = np.where((strength >= raise_strength) & (observation.legal & RAISE).astype(bool), RAISE, actions)
+        return actions, amounts
+    return policy
+
+
+def parse_args():
+    '''
+    Parses the sweep demo options.
+    '''
+    parser = argparse.ArgumentParser(prog='python3 vector_sim.py')
+    parser.add_argument('--rounds', type=int, default=20000, help='Rounds per grid point, defaults to 20000')
+    parser.add_argument('--iters', type=int, default=50, help='Monte Carlo samples per decision, defaults to 50')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed, defaults to 0')
+    return parser.parse_args()
+
+
+def main():
+    '''
+    Sweeps the raise and call thresholds of the threshold policy against a check-caller and a baseline
+    threshold policy, printing each grid point's mean delta per round. Every grid point plays the same
+    deals, so the threshold policies share one StrengthCache.
+    '''
+    args = parse_args()
+    strengths = StrengthCache(args.iters)
+    opponents = {'check_call': check_call_policy, 'threshold_0.7': make_threshold_policy(0.7, strengths=strengths)}
+    print('raise  margin' + ''.join(name.rjust(24) for name in opponents))
+    start_time = time.perf_counter()
+    total_rounds = 0
+    for raise_strength in (0.6, 0.7, 0.8):
+        for call_margin in (0., 0.1):
+            policy = make_threshold_policy(raise_strength, call_margin, strengths=strengths)
+            cells = []
+            for opponent in opponents.values():
+                deltas = simulate(policy, opponent, args.rounds, np.random.default_rng(args.seed))
+                total_rounds += args.rounds
+                cells.append('{:+.2f} +- {:.2f}'.format(deltas.mean(), deltas.std() / len(deltas) ** 0.5).rjust(24))
+            print('{:5.2f}  {:6.2f}'.format(raise_strength, call_margin) + ''.join(cells))
+    elapsed = time.perf_counter() - start_time
+    print('Simulated {} rounds in {:.1f} s ({:.0f} rounds/s)'.format(total_rounds, elapsed, total_rounds / elapsed))
+
+
+if __name__ == '__main__':
+    main()